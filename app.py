@@ -1,7 +1,8 @@
-from src import app
+from src import create_app
 
 
 def run():
+    app = create_app()
     app.run(host="0.0.0.0")
 
 
@@ -0,0 +1,62 @@
+"""Gunicorn production profile.
+
+The app is loaded once in the master process and shared by workers with
+copy-on-write, so it must not open database or Redis connections
+at startup. Workers are gevent based: one worker per CPU core serves
+up to `worker_connections` concurrent requests.
+
+Prometheus metrics of all workers are collected in PROMETHEUS_MULTIPROC_DIR,
+it is set here, before the app and prometheus_client are imported.
+The master process serves them on METRICS_PORT, apart from the API.
+"""
+import glob
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gevent"
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc"
+)
+
+metrics_port = int(os.getenv("METRICS_PORT", 9100))
+
+# Drop metrics left by the previous run, the preloaded app writes here on import.
+os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+for path in glob.glob(os.path.join(prometheus_multiproc_dir, "*.db")):
+    os.remove(path)
+
+
+def when_ready(server):
+    """Serve metrics of all workers on a separate port."""
+    from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(metrics_port, registry=registry)
+
+
+def post_fork(server, worker):
+    """Drop connection pools inherited from the master process."""
+    from src.db.postgres import reset_db_pool
+    from src.db.redis import reset_redis_pool
+
+    reset_db_pool(worker.app.wsgi())
+    reset_redis_pool()
+
+
+def child_exit(server, worker):
+    """Stop reporting live metrics of the exited worker."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
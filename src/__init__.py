@@ -1,5 +1,4 @@
 from flask import Flask
-from flask_jwt_extended import JWTManager
 from flask_login import LoginManager
 from flask_security import Security, SQLAlchemyUserDatastore
 
@@ -7,9 +6,16 @@ from src.account.views import account
 from src.account.views import api as auth_api
 from src.admin.views import admin
 from src.admin.views import api as admin_api
+from src.commands import init_commands
 from src.db.postgres import db, init_db
 from src.db.redis import init_redis_db
 from src.models.user import Role, User
+from src.services.auth_log import auth_log_writer
+from src.services.jwks import key_ring
+from src.services.password import password_hasher
+from src.services.revocation import token_revocation_service
+from src.utils.jwt_manager import CachingJWTManager
+from src.utils.metrics import init_metrics
 
 from .config import Settings
 
@@ -23,16 +29,25 @@ def create_app(config=None):
     login_manager.init_app(app)
     app.config.from_object(Settings)
 
+    init_metrics(app)
     init_db(app)
     init_redis_db(app)
 
-    JWTManager(app)
-    Security(app, SQLAlchemyUserDatastore(db, User, Role), register_blueprint=False)
+    auth_log_writer.init_app(app)
+
+    jwt_manager = CachingJWTManager(
+        app, cache_size=Settings.JWT_DECODED_TOKENS_CACHE_SIZE
+    )
+    key_ring.init_app(app, jwt_manager)
+    token_revocation_service.init_app(jwt_manager)
+    security = Security(
+        app, SQLAlchemyUserDatastore(db, User, Role), register_blueprint=False
+    )
+    password_hasher.init_app(app, security)
 
     app.register_blueprint(account)
     app.register_blueprint(admin)
 
-    return app
-
+    init_commands(app)
 
-app = create_app()
+    return app
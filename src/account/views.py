@@ -1,13 +1,19 @@
 from http import HTTPStatus
 from typing import Optional
 
-from flask import Blueprint, abort
+from flask import (Blueprint, Response, abort, jsonify, request,
+                   stream_with_context)
 from flask_jwt_extended import get_jwt, jwt_required
 from flask_restx import Api, Resource, reqparse
-from flask_security.registerable import register_user
 
-from src.models.user import USER_DATASTORE, User
+from src.config import Settings
+from src.models.user import User
 from src.services.auth import auth_service
+from src.services.jwks import key_ring
+from src.services.rate_limit import (LOGIN_CLIENT_RULE, LOGIN_EMAIL_RULE,
+                                     LOGIN_IP_RULE, REFRESH_CLIENT_RULE,
+                                     REGISTER_IP_RULE, rate_limiter)
+from src.services.revocation import token_revocation_service
 
 account = Blueprint("account", __name__)
 api = Api(account)
@@ -25,6 +31,8 @@ class Login(Resource):
     """Endpoint to user login."""
 
     @api.expect(login_post_parser)
+    @api.response(HTTPStatus.TOO_MANY_REQUESTS, "Too many attempts")
+    @rate_limiter.limit(LOGIN_EMAIL_RULE, LOGIN_IP_RULE, LOGIN_CLIENT_RULE)
     def post(self):
         """Check user credentials and get JWT token for user."""
 
@@ -38,10 +46,13 @@ class Login(Resource):
         )
         if not authenticated_user:
             return abort(HTTPStatus.FORBIDDEN, error_message)
-        jwt_tokens = auth_service.get_jwt_tokens(authenticated_user)
+        rate_limiter.reset(LOGIN_EMAIL_RULE)
+        jwt_tokens = auth_service.get_jwt_tokens(user_id=authenticated_user.id)
 
         user_agent = args.get("User-Agent")
-        auth_service.save_refresh_token_in_redis(jwt_tokens.get("refresh"), user_agent)
+        auth_service.save_refresh_token_in_redis(
+            jwt_tokens.get("refresh"), user_agent, ip=request.remote_addr
+        )
         auth_service.create_user_auth_log(
             user_id=authenticated_user.id, device=user_agent
         )
@@ -49,17 +60,76 @@ class Login(Resource):
         return jwt_tokens
 
 
+login_history_get_parser = reqparse.RequestParser()
+login_history_get_parser.add_argument(
+    "size", type=int, location="args", default=Settings.LOGIN_HISTORY_PAGE_SIZE
+)
+login_history_get_parser.add_argument("cursor", location="args")
+
+
 @api.route("/login_history")
 class LoginHistory(Resource):
     """Endpoint to represent user login history."""
 
+    @api.expect(login_history_get_parser)
     @jwt_required()
     def get(self):
-        """Get user login history info."""
+        """Get user login history info page by page, newest first.
+
+        Page size is limited by LOGIN_HISTORY_MAX_PAGE_SIZE,
+        pass 'next_cursor' of the response to get the next page.
+        """
+        args = login_history_get_parser.parse_args()
+        size = min(args.get("size"), Settings.LOGIN_HISTORY_MAX_PAGE_SIZE)
+        if size < 1:
+            return abort(HTTPStatus.BAD_REQUEST, "Page size must be positive.")
+
         token_payload = get_jwt()
         user_id = token_payload.get("sub")
-        user_logs = auth_service.get_auth_user_logs(user_id)
-        return user_logs
+        try:
+            user_logs = auth_service.get_auth_user_logs(
+                user_id, size=size, cursor=args.get("cursor")
+            )
+        except ValueError as error:
+            return abort(HTTPStatus.BAD_REQUEST, str(error))
+        return Response(stream_with_context(user_logs), mimetype="application/json")
+
+
+sessions_get_parser = reqparse.RequestParser()
+sessions_get_parser.add_argument("User-Agent", location="headers")
+
+
+@api.route("/sessions")
+class Sessions(Resource):
+    """Endpoint to represent active user sessions."""
+
+    @api.expect(sessions_get_parser)
+    @jwt_required()
+    def get(self):
+        """Get active sessions with device, IP and refresh times.
+
+        The session of the requesting device is marked as current.
+        """
+        args = sessions_get_parser.parse_args()
+        user_id = get_jwt().get("sub")
+        current_session_id = auth_service.session_id(args.get("User-Agent"))
+        sessions = auth_service.get_user_sessions(user_id)
+        for session in sessions:
+            session["current"] = session["id"] == current_session_id
+        return {"sessions": sessions}
+
+
+@api.route("/sessions/<string:session_id>")
+class SessionDetail(Resource):
+    """Endpoint to revoke a user session."""
+
+    @jwt_required()
+    def delete(self, session_id):
+        """Delete session, its refresh token can no longer be used."""
+        user_id = get_jwt().get("sub")
+        if not auth_service.delete_user_session(user_id, session_id):
+            return abort(HTTPStatus.NOT_FOUND, "Session not found!")
+        return {"msg": "Session deleted!"}
 
 
 credentials_change_put = reqparse.RequestParser()
@@ -114,7 +184,7 @@ class Logout(Resource):
     @api.expect(logout_post_parser)
     @jwt_required()
     def post(self):
-        """Logout user with deleting refresh tokens.
+        """Logout user with revoking access token and deleting refresh tokens.
 
         If 'is_full' request param exists, then delete all refresh tokens.
         """
@@ -124,6 +194,9 @@ class Logout(Resource):
 
         user_id = token_payload.get("sub")
         user_agent = args.get("User-Agent")
+        token_revocation_service.revoke(
+            jti=token_payload.get("jti"), expired=token_payload.get("exp")
+        )
         if args.get("is_full"):
             auth_service.delete_all_refresh_tokens(user_id)
         else:
@@ -145,15 +218,16 @@ class Register(Resource):
     """Endpoint to sign up."""
 
     @api.expect(register_post_parser)
+    @rate_limiter.limit(REGISTER_IP_RULE)
     def post(self):
         """Register a new user."""
         args = register_post_parser.parse_args()
         email = args.get("email")
         password = args.get("password")
 
-        if USER_DATASTORE.get_user(identifier=email):
+        if auth_service.get_user_by_email(email):
             return abort(HTTPStatus.BAD_REQUEST, "This email address already exists!")
-        register_user(email=email, password=password)
+        auth_service.register_user(email=email, password=password)
         return {
             "msg": "Thank you for registering. Now you can log in to your account.",
         }
@@ -169,6 +243,7 @@ class Refresh(Resource):
     """Endpoint to refresh JWT tokens."""
 
     @api.expect(refresh_post_parser)
+    @rate_limiter.limit(REFRESH_CLIENT_RULE)
     @jwt_required(refresh=True)
     def post(self):
         """Create new pair of access and refresh JWT tokens for user."""
@@ -176,14 +251,31 @@ class Refresh(Resource):
         args = refresh_post_parser.parse_args()
 
         user_agent: str = args.get("User-Agent")
+        refresh_token: str = args.get("Authorization").split()[-1]
 
         token_payload = get_jwt()
         user_id: str = token_payload.get("sub")
 
         jwt_tokens: Optional[dict] = auth_service.refresh_jwt_tokens(
-            user_id=user_id, user_agent=user_agent
+            user_id=user_id,
+            user_agent=user_agent,
+            refresh_token=refresh_token,
+            ip=request.remote_addr,
         )
 
         if not jwt_tokens:
             return abort(HTTPStatus.UNAUTHORIZED, "Authentication Timeout!")
         return jwt_tokens
+
+
+@api.route("/.well-known/jwks.json")
+class Jwks(Resource):
+    """Endpoint to represent public keys to verify JWT tokens."""
+
+    def get(self):
+        """Get JSON Web Key Set, empty if tokens are signed with a secret."""
+        response = jsonify(key_ring.jwks())
+        response.cache_control.public = True
+        response.cache_control.max_age = Settings.JWKS_MAX_AGE
+        response.set_etag(key_ring.jwks_etag)
+        return response.make_conditional(request)
@@ -1,10 +1,11 @@
 from http import HTTPStatus
 
-from flask import Blueprint, abort
+from flask import Blueprint, abort, jsonify, request
 from flask_jwt_extended import jwt_required
 from flask_restx import Api, Resource, fields, reqparse
 
-from src.models.user import Permission, Role, User
+from src.config import Settings
+from src.models.user import Permission, Role
 from src.services.role import role_service
 from src.services.user import user_service
 from src.utils.utils import check_permission, is_valid_uuid
@@ -18,13 +19,20 @@ role_response_model = api.model(
         "id": fields.String(),
         "name": fields.String(),
         "permissions": fields.Integer(),
+        "effective_permissions": fields.Integer(),
+        "parent_id": fields.String(),
         "description": fields.String(),
     },
 )
 
 roles_list_get_parser = reqparse.RequestParser(bundle_errors=True)
-roles_list_get_parser.add_argument("page", required=True, type=int, location="args")
-roles_list_get_parser.add_argument("size", required=True, type=int, location="args")
+roles_list_get_parser.add_argument("page", type=int, location="args", default=1)
+roles_list_get_parser.add_argument(
+    "size", type=int, location="args", default=Settings.ROLES_PAGE_SIZE
+)
+roles_list_get_parser.add_argument(
+    "after", location="args", help="Id of the last role of the previous page"
+)
 
 roles_list_post_parser = reqparse.RequestParser(bundle_errors=True)
 roles_list_post_parser.add_argument("name", required=True, location="form")
@@ -32,6 +40,7 @@ roles_list_post_parser.add_argument(
     "permissions", required=True, type=int, location="form"
 )
 roles_list_post_parser.add_argument("description", required=False)
+roles_list_post_parser.add_argument("parent_id", required=False)
 
 
 @api.route("/roles")
@@ -39,13 +48,28 @@ class RolesList(Resource):
     """Shows a list of all roles, and lets you POST to add new role"""
 
     @api.expect(roles_list_get_parser)
-    @api.marshal_with(role_response_model, code=HTTPStatus.OK, as_list=True)
+    @api.response(HTTPStatus.OK, "Success", [role_response_model])
+    @api.response(HTTPStatus.NOT_MODIFIED, "Roles were not changed")
     @jwt_required()
     @check_permission(Permission.VIEW)
     def get(self):
-        """List all roles."""
+        """List roles ordered by id.
+
+        Total count of roles is sent in X-Total-Count header,
+        ETag of a page changes only when roles change.
+        """
         args = roles_list_get_parser.parse_args()
-        return role_service.get_roles(page=args.get("page"), size=args.get("size"))
+        if args.get("page") < 1 or args.get("size") < 1:
+            return abort(HTTPStatus.BAD_REQUEST)
+
+        size, page, after = args.get("size"), args.get("page"), args.get("after")
+        catalogue, roles = role_service.get_roles(size=size, page=page, after=after)
+        response = jsonify(roles)
+        response.headers["X-Total-Count"] = len(catalogue.roles)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.set_etag(catalogue.page_etag(size=size, page=page, after=after))
+        return response.make_conditional(request)
 
     @api.expect(roles_list_post_parser)
     @jwt_required()
@@ -56,12 +80,20 @@ class RolesList(Resource):
         name = args.get("name")
         permissions = args.get("permissions")
         description = args.get("description")
+        parent_id = args.get("parent_id")
 
         if role_service.get_role_by_name(name=name):
             return abort(HTTPStatus.BAD_REQUEST, "This role already exists!")
+        if parent_id and not (
+            is_valid_uuid(parent_id) and role_service.get_role_by_id(id=parent_id)
+        ):
+            return abort(HTTPStatus.BAD_REQUEST, "Parent role does not exist!")
 
         role_service.add_role(
-            role_name=name, permissions=permissions, description=description
+            role_name=name,
+            permissions=permissions,
+            description=description,
+            parent_id=parent_id,
         )
         return {"msg": "Role created!"}
 
@@ -70,6 +102,7 @@ role_detail_put_parser = reqparse.RequestParser()
 role_detail_put_parser.add_argument("name", required=False)
 role_detail_put_parser.add_argument("permissions", type=int, required=False)
 role_detail_put_parser.add_argument("description", required=False)
+role_detail_put_parser.add_argument("parent_id", required=False)
 
 
 @api.route("/role/<string:id>")
@@ -99,7 +132,7 @@ class RoleDetail(Resource):
 
         updated_fields = {
             field: args[field]
-            for field in ["name", "permissions", "description"]
+            for field in ["name", "permissions", "description", "parent_id"]
             if args.get(field)
         }
 
@@ -109,6 +142,13 @@ class RoleDetail(Resource):
             name=updated_fields["name"]
         ):
             return abort(HTTPStatus.BAD_REQUEST, "This role already exists!")
+        if parent_id := updated_fields.get("parent_id"):
+            if not (
+                is_valid_uuid(parent_id) and role_service.get_role_by_id(id=parent_id)
+            ):
+                return abort(HTTPStatus.BAD_REQUEST, "Parent role does not exist!")
+            if not role_service.can_inherit(role_id=id, parent_id=parent_id):
+                return abort(HTTPStatus.BAD_REQUEST, "Role inheritance cycle!")
 
         role_service.update_role(role=role, updated_fields=updated_fields)
         return {"msg": "Role updated!"}
@@ -139,15 +179,14 @@ class UserRole(Resource):
 
         args = user_role_post_parser.parse_args()
         role_id = args.get("role_id")
-        user = User.query.filter_by(id=user_id).first_or_404()
-        role = Role.query.filter_by(id=role_id).first_or_404()
-
         if not all([is_valid_uuid(user_id), is_valid_uuid(role_id)]):
             return abort(HTTPStatus.BAD_REQUEST)
-        if user_service.has_role(user_id=user_id, role_id=role_id):
-            return abort(HTTPStatus.BAD_REQUEST, "User already has this role!")
 
-        user_service.add_role(user=user, role=role)
+        [result] = user_service.add_roles([(user_id, role_id)])
+        if result["status"] == "not_found":
+            return abort(HTTPStatus.NOT_FOUND)
+        if result["status"] == "exists":
+            return abort(HTTPStatus.BAD_REQUEST, "User already has this role!")
         return {"msg": "Role added!"}
 
 
@@ -163,10 +202,116 @@ class UserRole(Resource):
         """Delete user role."""
         if not all([is_valid_uuid(user_id), is_valid_uuid(role_id)]):
             return abort(HTTPStatus.BAD_REQUEST)
-        if not user_service.has_role(user_id=user_id, role_id=role_id):
-            return abort(HTTPStatus.NOT_FOUND, "User does not have this role!")
 
-        user = User.query.filter_by(id=user_id).first_or_404()
-        role = Role.query.filter_by(id=role_id).first_or_404()
-        user_service.delete_role(user=user, role=role)
+        [result] = user_service.delete_roles([(user_id, role_id)])
+        if result["status"] == "not_found":
+            return abort(HTTPStatus.NOT_FOUND, "User does not have this role!")
         return {"msg": "Role deleted!"}
+
+
+user_role_pair_model = api.model(
+    "User role pair",
+    {
+        "user_id": fields.String(required=True),
+        "role_id": fields.String(required=True),
+    },
+)
+users_roles_filter_model = api.model(
+    "Users filter",
+    {"email": fields.String(required=True, description="SQL LIKE pattern")},
+)
+users_roles_request_model = api.model(
+    "Bulk user roles request",
+    {
+        "items": fields.List(fields.Nested(user_role_pair_model)),
+        "role_id": fields.String(),
+        "filter": fields.Nested(users_roles_filter_model),
+    },
+)
+users_roles_response_model = api.model(
+    "Bulk user roles response",
+    {
+        "results": fields.List(
+            fields.Nested(
+                api.model(
+                    "User role result",
+                    {
+                        "user_id": fields.String(),
+                        "role_id": fields.String(),
+                        "status": fields.String(),
+                    },
+                )
+            )
+        ),
+        "matched": fields.Integer(description="Users matching the filter"),
+        "changed": fields.Integer(description="Added or deleted user roles"),
+    },
+)
+
+
+@api.route("/users/roles")
+class UsersRoles(Resource):
+    """
+    Lets you POST to add and DELETE to remove roles of many users at once.
+
+    Body is either a list of pairs {"items": [{"user_id", "role_id"}]}
+    with status of every pair in response, or a role with users filter
+    {"role_id", "filter": {"email"}} with numbers of matched users
+    and changed roles in response.
+    """
+
+    @api.expect(users_roles_request_model)
+    @api.marshal_with(users_roles_response_model, skip_none=True)
+    @jwt_required()
+    @check_permission(Permission.CREATE)
+    def post(self):
+        """Add roles to users."""
+        return self._apply(user_service.add_roles, user_service.add_role_by_email)
+
+    @api.expect(users_roles_request_model)
+    @api.marshal_with(users_roles_response_model, skip_none=True)
+    @jwt_required()
+    @check_permission(Permission.DELETE)
+    def delete(self):
+        """Delete roles of users."""
+        return self._apply(
+            user_service.delete_roles, user_service.delete_role_by_email
+        )
+
+    def _apply(self, by_pairs, by_filter) -> dict:
+        body = api.payload or {}
+        if body.get("filter"):
+            role_id = body.get("role_id")
+            email = body["filter"].get("email")
+            if not email or not is_valid_uuid(str(role_id)):
+                return abort(HTTPStatus.BAD_REQUEST)
+            result = by_filter(
+                role_id=role_id,
+                email_pattern=email,
+                limit=Settings.BULK_ROLES_MAX_ITEMS,
+            )
+            if result["matched"] > Settings.BULK_ROLES_MAX_ITEMS:
+                return abort(
+                    HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                    f"Filter matches more than {Settings.BULK_ROLES_MAX_ITEMS} users!",
+                )
+            return result
+
+        items = body.get("items") or []
+        if len(items) > Settings.BULK_ROLES_MAX_ITEMS:
+            return abort(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"No more than {Settings.BULK_ROLES_MAX_ITEMS} items per request!",
+            )
+
+        pairs, invalid = [], []
+        for item in items:
+            user_id, role_id = item.get("user_id"), item.get("role_id")
+            if is_valid_uuid(str(user_id)) and is_valid_uuid(str(role_id)):
+                pairs.append((user_id, role_id))
+            else:
+                invalid.append(
+                    {"user_id": user_id, "role_id": role_id, "status": "invalid"}
+                )
+        results = by_pairs(pairs) if pairs else []
+        return {"results": results + invalid}
@@ -0,0 +1,23 @@
+"""Async (ASGI) variant of the account API: /login, /refresh and /logout.
+
+    uvicorn src.asgi.app:app --host 0.0.0.0 --port 8000 --workers 4
+
+Requests are handled by the account views of the Flask app in a thread pool,
+so both variants share one implementation of authentication and sessions.
+"""
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from src import create_app
+from src.asgi.services import create_views_adapter
+
+views_adapter = create_views_adapter(create_app())
+
+app = Starlette(
+    routes=[
+        Route("/login", views_adapter.dispatch, methods=["POST"]),
+        Route("/refresh", views_adapter.dispatch, methods=["POST"]),
+        Route("/logout", views_adapter.dispatch, methods=["POST"]),
+    ],
+    on_shutdown=[views_adapter.shutdown],
+)
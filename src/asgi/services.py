@@ -0,0 +1,84 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from flask import Flask, Response
+from starlette.requests import Request
+from starlette.responses import Response as ASGIResponse
+from werkzeug.test import EnvironBuilder
+
+from src.config import Settings
+
+DispatchResult = Tuple[int, List[Tuple[str, str]], bytes]
+
+
+class FlaskViewsAdapter:
+    """Async adapter running account API views of the Flask app.
+
+    Requests are handled by the same views and services as in the WSGI app,
+    so rate limits, emails filter, password hashing pool, sessions, token
+    revocation and batched auth log apply to both. Views do blocking I/O,
+    so they run in a thread pool sized to the database connection pool and
+    the event loop keeps accepting requests.
+    """
+
+    def __init__(self, flask_app: Flask, max_workers: int):
+        self.flask_app = flask_app
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="flask-view"
+        )
+
+    async def dispatch(self, request: Request) -> ASGIResponse:
+        """Handle request by the Flask app in the thread pool."""
+        body = await request.body()
+        status, headers, content = await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            self._dispatch,
+            request.method,
+            request.url.path,
+            request.url.query,
+            list(request.headers.items()),
+            body,
+            request.client.host if request.client else "",
+        )
+        response = ASGIResponse(content, status_code=status)
+        response.raw_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers
+        ]
+        return response
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _dispatch(
+        self,
+        method: str,
+        path: str,
+        query_string: str,
+        headers: list,
+        body: bytes,
+        remote_addr: str,
+    ) -> DispatchResult:
+        builder = EnvironBuilder(
+            path=path,
+            method=method,
+            query_string=query_string,
+            headers=headers,
+            data=body,
+            environ_base={"REMOTE_ADDR": remote_addr},
+        )
+        try:
+            environ = builder.get_environ()
+        finally:
+            builder.close()
+        response = Response.from_app(self.flask_app, environ, buffered=True)
+        return response.status_code, response.headers.to_wsgi_list(), response.data
+
+
+def create_views_adapter(flask_app: Flask) -> FlaskViewsAdapter:
+    engine_options = Settings.SQLALCHEMY_ENGINE_OPTIONS
+    return FlaskViewsAdapter(
+        flask_app,
+        max_workers=engine_options["pool_size"] + engine_options["max_overflow"],
+    )
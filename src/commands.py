@@ -0,0 +1,168 @@
+from pathlib import Path
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+from src.config import Settings
+from src.db import migrations
+from src.db.partitions import (create_monthly_partitions,
+                               detach_expired_partitions)
+from src.db.postgres import db
+from src.models.user import AuthorizationUserLog
+from src.services.auth import auth_service
+from src.services.email_filter import email_filter
+from src.services.importer import Importer, read_records
+from src.services.jwks import PRIVATE_KEY_SUFFIX, generate_private_key
+from src.services.password import password_hasher
+from src.services.permission import permission_service
+from src.services.role import role_service
+
+db_cli = AppGroup("db", help="Manage database schema.")
+keys_cli = AppGroup("keys", help="Manage JWT signing keys.")
+sessions_cli = AppGroup("sessions", help="Manage user refresh token sessions.")
+import_cli = AppGroup("import", help="Bulk import of users and roles.")
+partitions_cli = AppGroup("partitions", help="Manage auth user logs partitions.")
+emails_cli = AppGroup("emails", help="Manage registered emails filter.")
+
+
+@keys_cli.command("generate")
+@click.argument("kid")
+@click.option("--algorithm", default=Settings.JWT_ALGORITHM, show_default=True)
+def generate_key(kid: str, algorithm: str):
+    """Generate a new JWT signing key with KID key id."""
+    path = Path(Settings.JWT_KEYS_DIR) / f"{kid}{PRIVATE_KEY_SUFFIX}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        raise click.ClickException(f"Key {path} already exists.")
+    path.write_bytes(generate_private_key(algorithm))
+    path.chmod(0o600)
+    click.echo(f"Key {path} was generated.")
+
+
+@sessions_cli.command("reindex")
+def reindex_sessions():
+    """Move refresh tokens saved before session records existed to sessions."""
+    users_count = auth_service.migrate_legacy_refresh_tokens()
+    click.echo(f"Sessions of {users_count} users were migrated.")
+
+
+@emails_cli.command("reindex")
+def reindex_emails():
+    """Add emails of all users to the registered emails filter."""
+    users_count = email_filter.rebuild()
+    click.echo(f"Emails of {users_count} users were indexed.")
+
+
+@partitions_cli.command("create")
+@click.option(
+    "--months-ahead", default=Settings.AUTH_LOG_PARTITIONS_AHEAD, show_default=True
+)
+def create_partitions(months_ahead: int):
+    """Create partitions for current and upcoming months."""
+    _create_auth_log_partitions(months_ahead)
+
+
+def _create_auth_log_partitions(months_ahead: int):
+    with db.engine.begin() as connection:
+        partitions = create_monthly_partitions(
+            connection, AuthorizationUserLog.__tablename__, months_ahead=months_ahead
+        )
+    click.echo(f"Partitions are ready: {', '.join(partitions)}.")
+
+
+@partitions_cli.command("prune")
+@click.option(
+    "--retention-months",
+    default=Settings.AUTH_LOG_RETENTION_MONTHS,
+    show_default=True,
+)
+@click.option(
+    "--archive", is_flag=True, help="Move partitions to archive schema, not drop."
+)
+def prune_partitions(retention_months: int, archive: bool):
+    """Drop or archive partitions older than retention period."""
+    with db.engine.begin() as connection:
+        partitions = detach_expired_partitions(
+            connection,
+            AuthorizationUserLog.__tablename__,
+            retention_months=retention_months,
+            archive=archive,
+        )
+    click.echo(f"Detached partitions: {', '.join(partitions) or 'none'}.")
+
+
+@db_cli.command("upgrade")
+def upgrade_db():
+    """Apply database migrations and create upcoming auth log partitions."""
+    applied = migrations.upgrade(db.engine)
+    click.echo(f"Applied migrations: {', '.join(applied) or 'none'}.")
+    _create_auth_log_partitions(Settings.AUTH_LOG_PARTITIONS_AHEAD)
+
+
+@db_cli.command("current")
+def current_db():
+    """Show applied database migrations."""
+    with db.engine.connect() as connection:
+        applied_versions = migrations.get_applied_versions(connection)
+    for version, name in migrations.get_migrations():
+        status = "applied" if version in applied_versions else "pending"
+        click.echo(f"{name}: {status}")
+
+
+file_format_option = click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "jsonl"]),
+    help="File format, detected by extension by default.",
+)
+batch_size_option = click.option("--batch-size", default=10000, show_default=True)
+
+
+@import_cli.command("roles")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@file_format_option
+@batch_size_option
+def import_roles(path: str, file_format: str, batch_size: int):
+    """Import roles with name, permissions and description fields."""
+    importer = Importer(batch_size=batch_size)
+    roles_count = importer.import_roles(read_records(path, file_format))
+    role_service.bump_generation()
+    click.echo(f"Created {roles_count} roles.")
+
+
+@import_cli.command("users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@file_format_option
+@batch_size_option
+@click.option("--workers", type=int, help="Password hashing processes.")
+def import_users(path: str, file_format: str, batch_size: int, workers: int):
+    """Import users with email, password or password_hash, active and roles."""
+    importer = Importer(batch_size=batch_size, workers=workers)
+    users_count, memberships_count = importer.import_users(
+        read_records(path, file_format), rounds=password_hasher.rounds
+    )
+    email_filter.rebuild()
+    permission_service.invalidate_users(importer.changed_user_ids)
+    click.echo(f"Created {users_count} users and {memberships_count} user roles.")
+
+
+@import_cli.command("memberships")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@file_format_option
+@batch_size_option
+def import_memberships(path: str, file_format: str, batch_size: int):
+    """Import user roles with email and role (or roles) fields."""
+    importer = Importer(batch_size=batch_size)
+    memberships_count = importer.import_memberships(read_records(path, file_format))
+    permission_service.invalidate_users(importer.changed_user_ids)
+    click.echo(f"Created {memberships_count} user roles.")
+
+
+def init_commands(app: Flask):
+    app.cli.add_command(db_cli)
+    app.cli.add_command(keys_cli)
+    app.cli.add_command(import_cli)
+    app.cli.add_command(sessions_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(emails_cli)
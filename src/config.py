@@ -22,20 +22,105 @@ class Settings:
     )
 
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY")
+    JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
+    JWT_KEYS_DIR: str = os.getenv("JWT_KEYS_DIR", "keys")
+    JWT_SIGNING_KEY_ID: str = os.getenv("JWT_SIGNING_KEY_ID")
+    JWKS_MAX_AGE: int = int(os.getenv("JWKS_MAX_AGE", 3600))
     JWT_ACCESS_TOKEN_EXPIRES: timedelta = timedelta(
         hours=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", 1))
     )
     JWT_REFRESH_TOKEN_EXPIRES: timedelta = timedelta(
         hours=int(os.getenv("JWT_REFRESH_TOKEN_EXPIRES", 24))
     )
+    JWT_DECODED_TOKENS_CACHE_SIZE: int = int(
+        os.getenv("JWT_DECODED_TOKENS_CACHE_SIZE", 10000)
+    )
+
+    REVOKED_TOKENS_FILTER_CAPACITY: int = int(
+        os.getenv("REVOKED_TOKENS_FILTER_CAPACITY", 100000)
+    )
+    REVOKED_TOKENS_FILTER_ERROR_RATE: float = float(
+        os.getenv("REVOKED_TOKENS_FILTER_ERROR_RATE", 0.001)
+    )
+    REVOKED_TOKENS_FILTER_REFRESH_INTERVAL: int = int(
+        os.getenv("REVOKED_TOKENS_FILTER_REFRESH_INTERVAL", 60)
+    )
 
     SQLALCHEMY_DATABASE_URI: str = os.getenv("SQLALCHEMY_DATABASE_URI")
     SQLALCHEMY_TRACK_MODIFICATIONS: bool = bool(
         int(os.getenv("SQLALCHEMY_TRACK_MODIFICATIONS", 0))
     )
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 5000))
+    SQLALCHEMY_ENGINE_OPTIONS: dict = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": bool(int(os.getenv("DB_POOL_PRE_PING", 1))),
+    }
+    DB_SLOW_QUERY_MS: int = int(os.getenv("DB_SLOW_QUERY_MS", 200))
+    DB_REQUEST_QUERIES_WARNING: int = int(os.getenv("DB_REQUEST_QUERIES_WARNING", 20))
+
+    PASSWORD_HASH_WORKERS: int = int(
+        os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1)
+    )
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", 0))
+    PASSWORD_HASH_MIN_ROUNDS: int = int(os.getenv("PASSWORD_HASH_MIN_ROUNDS", 10))
+    PASSWORD_HASH_BUDGET_MS: int = int(os.getenv("PASSWORD_HASH_BUDGET_MS", 250))
+
+    PERMISSIONS_CACHE_SIZE: int = int(os.getenv("PERMISSIONS_CACHE_SIZE", 10000))
+    PERMISSIONS_CACHE_TTL: int = int(os.getenv("PERMISSIONS_CACHE_TTL", 300))
+
+    ROLES_CACHE_TTL: int = int(os.getenv("ROLES_CACHE_TTL", 300))
+    ROLES_PAGE_SIZE: int = int(os.getenv("ROLES_PAGE_SIZE", 50))
+
+    AUTH_LOG_BATCH_SIZE: int = int(os.getenv("AUTH_LOG_BATCH_SIZE", 500))
+    AUTH_LOG_FLUSH_INTERVAL_MS: int = int(os.getenv("AUTH_LOG_FLUSH_INTERVAL_MS", 200))
+    AUTH_LOG_QUEUE_SIZE: int = int(os.getenv("AUTH_LOG_QUEUE_SIZE", 10000))
+
+    AUTH_LOG_PARTITIONS_AHEAD: int = int(os.getenv("AUTH_LOG_PARTITIONS_AHEAD", 3))
+    AUTH_LOG_RETENTION_MONTHS: int = int(os.getenv("AUTH_LOG_RETENTION_MONTHS", 12))
+
+    LOGIN_HISTORY_PAGE_SIZE: int = int(os.getenv("LOGIN_HISTORY_PAGE_SIZE", 20))
+    LOGIN_HISTORY_MAX_PAGE_SIZE: int = int(
+        os.getenv("LOGIN_HISTORY_MAX_PAGE_SIZE", 100)
+    )
+
+    BULK_ROLES_MAX_ITEMS: int = int(os.getenv("BULK_ROLES_MAX_ITEMS", 10000))
+
+    EMAIL_FILTER_CAPACITY: int = int(os.getenv("EMAIL_FILTER_CAPACITY", 1000000))
+    EMAIL_FILTER_ERROR_RATE: float = float(os.getenv("EMAIL_FILTER_ERROR_RATE", 0.01))
+    EMAIL_FILTER_REFRESH_INTERVAL: int = int(
+        os.getenv("EMAIL_FILTER_REFRESH_INTERVAL", 300)
+    )
+    EMAIL_FILTER_REBUILD_INTERVAL: int = int(
+        os.getenv("EMAIL_FILTER_REBUILD_INTERVAL", 86400)
+    )
+
+    RATE_LIMIT_ENABLED: bool = bool(int(os.getenv("RATE_LIMIT_ENABLED", 1)))
+    RATE_LIMIT_WINDOW: int = int(os.getenv("RATE_LIMIT_WINDOW", 60))
+    RATE_LIMIT_LOCKOUT: int = int(os.getenv("RATE_LIMIT_LOCKOUT", 60))
+    RATE_LIMIT_MAX_LOCKOUT: int = int(os.getenv("RATE_LIMIT_MAX_LOCKOUT", 3600))
+    LOGIN_EMAIL_RATE_LIMIT: int = int(os.getenv("LOGIN_EMAIL_RATE_LIMIT", 5))
+    LOGIN_IP_RATE_LIMIT: int = int(os.getenv("LOGIN_IP_RATE_LIMIT", 100))
+    LOGIN_CLIENT_RATE_LIMIT: int = int(os.getenv("LOGIN_CLIENT_RATE_LIMIT", 30))
+    REGISTER_IP_RATE_LIMIT: int = int(os.getenv("REGISTER_IP_RATE_LIMIT", 20))
+    REFRESH_CLIENT_RATE_LIMIT: int = int(os.getenv("REFRESH_CLIENT_RATE_LIMIT", 60))
+
+    METRICS_ROUTE_ENABLED: bool = bool(int(os.getenv("METRICS_ROUTE_ENABLED", 0)))
 
 
 class RedisSettings:
     REDIS_HOST: str = os.getenv("REDIS_HOST")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT"))
     REDIS_DB: int = int(os.getenv("REDIS_DB"))
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_POOL_TIMEOUT: float = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", 2))
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = float(
+        os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 2)
+    )
+    REDIS_RETRY_ON_TIMEOUT: bool = bool(int(os.getenv("REDIS_RETRY_ON_TIMEOUT", 1)))
+    REDIS_HEALTH_CHECK_INTERVAL: int = int(
+        os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)
+    )
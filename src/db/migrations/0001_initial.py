@@ -0,0 +1,14 @@
+"""Baseline schema.
+
+Creates tables declared by models which do not exist yet, so databases
+created before migrations were introduced are adopted as is.
+Following migrations have to use explicit DDL.
+"""
+from sqlalchemy.engine import Connection
+
+from src.db.postgres import db
+from src.models import user  # noqa: F401
+
+
+def upgrade(connection: Connection):
+    db.metadata.create_all(bind=connection)
@@ -0,0 +1,49 @@
+"""Move auth user logs from not partitioned table into partitioned one."""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from src.config import Settings
+from src.db.partitions import create_monthly_partitions
+from src.models.user import AuthorizationUserLog
+
+
+def upgrade(connection: Connection):
+    table = AuthorizationUserLog.__table__
+    legacy_name = f"{table.name}_legacy"
+    is_partitioned = connection.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE relname = :name"),
+        name=table.name,
+    ).scalar()
+    if is_partitioned:
+        return
+
+    connection.execute(text(f"ALTER TABLE {table.name} RENAME TO {legacy_name}"))
+    connection.execute(
+        text(
+            f"ALTER TABLE {legacy_name} "
+            f"RENAME CONSTRAINT {table.name}_pkey TO {legacy_name}_pkey"
+        )
+    )
+    for index in table.indexes:
+        connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    table.create(connection)
+
+    since = connection.execute(
+        text(f"SELECT min(created_at) FROM {legacy_name}")
+    ).scalar()
+    if since:
+        create_monthly_partitions(
+            connection,
+            table.name,
+            months_ahead=Settings.AUTH_LOG_PARTITIONS_AHEAD,
+            since=since.date(),
+        )
+    connection.execute(
+        text(
+            f"INSERT INTO {table.name} (id, user_id, device, created_at, update_at) "
+            f"SELECT id, user_id, device, "
+            f"coalesce(created_at, update_at, now()), update_at "
+            f"FROM {legacy_name}"
+        )
+    )
+    connection.execute(text(f"DROP TABLE {legacy_name}"))
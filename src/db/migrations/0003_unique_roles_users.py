@@ -0,0 +1,28 @@
+"""Make user role memberships unique for ON CONFLICT upserts."""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+CONSTRAINT_NAME = "uq_roles_users_user_id_role_id"
+
+
+def upgrade(connection: Connection):
+    exists = connection.execute(
+        text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+        name=CONSTRAINT_NAME,
+    ).scalar()
+    if exists:
+        return
+    connection.execute(
+        text(
+            "DELETE FROM roles_users duplicate USING roles_users original "
+            "WHERE duplicate.ctid > original.ctid "
+            "AND duplicate.user_id = original.user_id "
+            "AND duplicate.role_id = original.role_id"
+        )
+    )
+    connection.execute(
+        text(
+            f"ALTER TABLE roles_users ADD CONSTRAINT {CONSTRAINT_NAME} "
+            "UNIQUE (user_id, role_id)"
+        )
+    )
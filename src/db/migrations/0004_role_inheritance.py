@@ -0,0 +1,28 @@
+"""Widen role permissions and add role inheritance.
+
+Effective permissions of a role include permissions of all its
+ancestors and are flattened on write, so reads stay a single lookup.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+def upgrade(connection: Connection):
+    connection.execute(
+        text(
+            "ALTER TABLE roles "
+            "ALTER COLUMN permissions TYPE bigint, "
+            "ADD COLUMN IF NOT EXISTS parent_id uuid "
+            "REFERENCES roles (id) ON DELETE SET NULL, "
+            "ADD COLUMN IF NOT EXISTS effective_permissions bigint"
+        )
+    )
+    connection.execute(
+        text(
+            "UPDATE roles SET effective_permissions = coalesce(permissions, 0) "
+            "WHERE effective_permissions IS NULL"
+        )
+    )
+    connection.execute(
+        text("ALTER TABLE roles ALTER COLUMN effective_permissions SET NOT NULL")
+    )
@@ -0,0 +1,52 @@
+"""Make emails and role names unique regardless of case.
+
+Emails are stored in lower case, plain unique constraints are replaced
+with lower() unique indexes. Values differing only in case have to be
+resolved manually before the migration.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+DUPLICATES_QUERY = (
+    "SELECT lower(trim({column})) FROM {table} GROUP BY 1 HAVING count(*) > 1"
+)
+
+
+def upgrade(connection: Connection):
+    for table, column in [("users", "email"), ("roles", "name")]:
+        duplicates = connection.execute(
+            text(DUPLICATES_QUERY.format(table=table, column=column))
+        ).scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                f"{table}.{column} values differ only in case: "
+                f"{', '.join(duplicates)}"
+            )
+
+    connection.execute(
+        text(
+            "UPDATE users SET email = lower(trim(email)) "
+            "WHERE email <> lower(trim(email))"
+        )
+    )
+    connection.execute(
+        text("UPDATE roles SET name = trim(name) WHERE name <> trim(name)")
+    )
+    connection.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_users_email_lower "
+            "ON users (lower(email))"
+        )
+    )
+    connection.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_roles_name_lower "
+            "ON roles (lower(name))"
+        )
+    )
+    connection.execute(
+        text("ALTER TABLE users DROP CONSTRAINT IF EXISTS users_email_key")
+    )
+    connection.execute(
+        text("ALTER TABLE roles DROP CONSTRAINT IF EXISTS roles_name_key")
+    )
@@ -0,0 +1,69 @@
+"""Versioned database migrations.
+
+Every migration is a `<version>_<name>.py` module of this package with
+`upgrade(connection)` function. Migrations are applied once per deploy with
+`flask db upgrade`, applied versions are saved in schema_migrations table.
+"""
+import importlib
+import pkgutil
+import re
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS_TABLE = "schema_migrations"
+# Serializes concurrent upgrades started by several deploy jobs.
+MIGRATIONS_LOCK_ID = 4_224_617
+
+_migration_name = re.compile(r"^(\d{4})_(\w+)$")
+
+
+def get_migrations() -> List[Tuple[int, str]]:
+    """Get versions and names of all migrations ordered by version."""
+    migrations = []
+    for module in pkgutil.iter_modules(__path__):
+        if match := _migration_name.match(module.name):
+            migrations.append((int(match[1]), module.name))
+    return sorted(migrations)
+
+
+def get_applied_versions(connection: Connection) -> set:
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+            "version integer PRIMARY KEY, "
+            "name varchar(255) NOT NULL, "
+            "applied_at timestamp with time zone NOT NULL DEFAULT now())"
+        )
+    )
+    rows = connection.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE}"))
+    return {version for (version,) in rows}
+
+
+def upgrade(engine: Engine) -> List[str]:
+    """Apply not applied migrations in one transaction.
+
+    Return names of applied migrations.
+    """
+    applied = []
+    with engine.begin() as connection:
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_id)"), lock_id=MIGRATIONS_LOCK_ID
+        )
+        applied_versions = get_applied_versions(connection)
+        for version, name in get_migrations():
+            if version in applied_versions:
+                continue
+            module = importlib.import_module(f"{__name__}.{name}")
+            module.upgrade(connection)
+            connection.execute(
+                text(
+                    f"INSERT INTO {MIGRATIONS_TABLE} (version, name) "
+                    "VALUES (:version, :name)"
+                ),
+                version=version,
+                name=name,
+            )
+            applied.append(name)
+    return applied
@@ -0,0 +1,158 @@
+"""Monthly range partitions management for append-only log tables."""
+import re
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+ARCHIVE_SCHEMA = "archive"
+# Serializes partitions creation by deploys and cron jobs.
+PARTITIONS_LOCK_ID = 4_224_618
+
+
+def add_months(month: date, months: int) -> date:
+    """Get first day of the month shifted by number of months."""
+    month_index = month.year * 12 + month.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_y{month.year}m{month.month:02d}"
+
+
+def default_partition_name(table_name: str) -> str:
+    return f"{table_name}_default"
+
+
+def create_default_partition(connection: Connection, table_name: str) -> str:
+    """Create partition for rows out of monthly partitions, return its name.
+
+    It keeps inserts working when upcoming partitions were not created
+    in time, such rows are moved out when their month partition is created.
+    """
+    name = default_partition_name(table_name)
+    connection.execute(
+        text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} DEFAULT")
+    )
+    return name
+
+
+def create_monthly_partitions(
+    connection: Connection,
+    table_name: str,
+    months_ahead: int,
+    since: Optional[date] = None,
+    partition_key: str = "created_at",
+) -> List[str]:
+    """Create missing partitions from `since` month to `months_ahead` months.
+
+    Concurrent calls wait for each other on an advisory lock held until
+    the end of the transaction. Return names of partitions checked or created.
+    """
+    connection.execute(
+        text("SELECT pg_advisory_xact_lock(:lock_id)"), lock_id=PARTITIONS_LOCK_ID
+    )
+    default_name = create_default_partition(connection, table_name)
+    current_month = date.today().replace(day=1)
+    month = (since or current_month).replace(day=1)
+    last_month = add_months(current_month, months_ahead)
+    partitions = []
+    while month <= last_month:
+        name = partition_name(table_name, month)
+        exists = connection.execute(
+            text("SELECT to_regclass(:name) IS NOT NULL"), name=name
+        ).scalar()
+        if not exists:
+            _create_partition(
+                connection, table_name, name, default_name, partition_key, month
+            )
+        partitions.append(name)
+        month = add_months(month, 1)
+    return partitions
+
+
+def _create_partition(
+    connection: Connection,
+    table_name: str,
+    name: str,
+    default_name: str,
+    partition_key: str,
+    month: date,
+):
+    """Create month partition moving its rows out of the default partition.
+
+    Postgres refuses to create a partition for values present in the default
+    one, so the default partition is detached while its rows are moved.
+    """
+    bounds = f"FROM ('{month}') TO ('{add_months(month, 1)}')"
+    in_month = (
+        f"{partition_key} >= '{month}' AND {partition_key} < '{add_months(month, 1)}'"
+    )
+    has_default_rows = connection.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default_name} WHERE {in_month})")
+    ).scalar()
+    if not has_default_rows:
+        connection.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {table_name} FOR VALUES {bounds}")
+        )
+        return
+
+    connection.execute(
+        text(f"ALTER TABLE {table_name} DETACH PARTITION {default_name}")
+    )
+    connection.execute(
+        text(f"CREATE TABLE {name} PARTITION OF {table_name} FOR VALUES {bounds}")
+    )
+    connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {default_name} WHERE {in_month} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        )
+    )
+    connection.execute(
+        text(f"ALTER TABLE {table_name} ATTACH PARTITION {default_name} DEFAULT")
+    )
+
+
+def get_partitions(connection: Connection, table_name: str) -> dict:
+    """Get partitions of the table by their month."""
+    rows = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = :table_name"
+        ),
+        table_name=table_name,
+    )
+    partitions = {}
+    pattern = re.compile(rf"^{table_name}_y(\d{{4}})m(\d{{2}})$")
+    for (name,) in rows:
+        if match := pattern.match(name):
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def detach_expired_partitions(
+    connection: Connection, table_name: str, retention_months: int, archive: bool
+) -> List[str]:
+    """Detach partitions older than retention period.
+
+    Detached partitions are moved to archive schema or dropped,
+    both are metadata only operations without scanning rows.
+    """
+    cutoff = add_months(date.today().replace(day=1), -retention_months)
+    if archive:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    detached = []
+    for month, name in sorted(get_partitions(connection, table_name).items()):
+        if month >= cutoff:
+            continue
+        connection.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+        if archive:
+            connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        else:
+            connection.execute(text(f"DROP TABLE {name}"))
+        detached.append(name)
+    return detached
@@ -1,11 +1,98 @@
-from flask import Flask
+import time
+
+from flask import Flask, g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from src.config import Settings
+from src.utils.metrics import DB_QUERY_DURATION, DB_SLOW_QUERIES
 
 db = SQLAlchemy()
 
 
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_query_started_at", None)
+    if started_at is None:
+        return
+    duration = time.perf_counter() - started_at
+    DB_QUERY_DURATION.observe(duration)
+
+    endpoint = None
+    if has_request_context():
+        endpoint = request.endpoint
+        g.db_queries = g.get("db_queries", 0) + 1
+        g.db_queries_time = g.get("db_queries_time", 0.0) + duration
+
+    if duration * 1000 >= Settings.DB_SLOW_QUERY_MS:
+        DB_SLOW_QUERIES.inc()
+        logger.warning(
+            f"Slow query took {duration * 1000:.1f} ms"
+            f" in endpoint {endpoint}: {statement}"
+        )
+
+
+def _set_statement_timeout(dbapi_connection, connection_record, connection_proxy):
+    """Limit statements of requests by DB_STATEMENT_TIMEOUT_MS.
+
+    Migrations, CLI commands and background workers share the engine
+    and run long statements, so their connections are not limited.
+    The timeout is set only when it differs from the one of the connection.
+    """
+    timeout = Settings.DB_STATEMENT_TIMEOUT_MS if has_request_context() else 0
+    if connection_record.info.get("statement_timeout") == timeout:
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"SET statement_timeout = {int(timeout)}")
+    cursor.close()
+    dbapi_connection.commit()
+    connection_record.info["statement_timeout"] = timeout
+
+
+def _log_request_queries(response):
+    queries = g.get("db_queries", 0)
+    if queries >= Settings.DB_REQUEST_QUERIES_WARNING:
+        logger.warning(
+            f"Endpoint {request.endpoint} executed {queries} queries"
+            f" in {g.get('db_queries_time', 0.0) * 1000:.1f} ms"
+        )
+    return response
+
+
+def init_query_instrumentation(app: Flask):
+    """Count and time SQL statements, log slow queries and N+1 suspects.
+
+    Statements of requests are limited by DB_STATEMENT_TIMEOUT_MS.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    if not event.contains(Pool, "checkout", _set_statement_timeout):
+        event.listen(Pool, "checkout", _set_statement_timeout)
+    app.after_request(_log_request_queries)
+
+
+def reset_db_pool(app: Flask):
+    """Forget connections inherited from the parent process after fork.
+
+    The master process does not open connections,
+    so disposing the pool does not close sockets shared with it.
+    """
+    with app.app_context():
+        db.engine.dispose()
+
+
 def init_db(app: Flask):
+    """Bind database to the app.
+
+    Schema is not created here, run `flask db upgrade` once per deploy.
+    """
     db.init_app(app)
-    with app.app_context():
-        db.create_all()
-        db.session.commit()
+    init_query_instrumentation(app)
@@ -1,13 +1,103 @@
+import time
+
 import redis
 from flask import Flask
+from redis.client import Pipeline
 
 from src.config import RedisSettings
+from src.utils.metrics import REDIS_COMMAND_DURATION, REDIS_POOL_WAIT_DURATION
+
+
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    """Blocking pool measuring time spent waiting for a free connection.
+
+    The pool waits on queue.LifoQueue, which is cooperative when
+    gevent monkey patching is applied before redis is imported.
+    """
+
+    def get_connection(self, command_name, *keys, **options):
+        started_at = time.perf_counter()
+        connection = super().get_connection(command_name, *keys, **options)
+        REDIS_POOL_WAIT_DURATION.observe(time.perf_counter() - started_at)
+        return connection
+
+
+class InstrumentedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        started_at = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_DURATION.observe(time.perf_counter() - started_at)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client measuring commands latency."""
+
+    def execute_command(self, *args, **options):
+        started_at = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.observe(time.perf_counter() - started_at)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class RedisPipeline:
+    """Send queued commands to Redis in one round trip on context exit.
+
+    Commands are called on the context object,
+    their results are available in `results` after exit.
+    """
+
+    def __init__(self, client: redis.Redis, transaction: bool = False):
+        self._pipe = client.pipeline(transaction=transaction)
+        self.results = []
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.results = self._pipe.execute()
+        finally:
+            self._pipe.reset()
+
+
+def create_redis_client(settings=RedisSettings) -> redis.Redis:
+    """Create client with connection pool configured by settings."""
+    connection_pool = InstrumentedConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        retry_on_timeout=settings.REDIS_RETRY_ON_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    )
+    return InstrumentedRedis(connection_pool=connection_pool)
+
+
+redis_db = create_redis_client()
+
+
+def pipeline(transaction: bool = False) -> RedisPipeline:
+    return RedisPipeline(redis_db, transaction=transaction)
+
 
-redis_db = redis.Redis(
-    host=RedisSettings.REDIS_HOST,
-    port=RedisSettings.REDIS_PORT,
-    db=RedisSettings.REDIS_DB,
-)
+def reset_redis_pool():
+    """Forget connections inherited from the parent process after fork."""
+    redis_db.connection_pool.reset()
 
 
 def init_redis_db(app: Flask):
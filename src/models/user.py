@@ -2,9 +2,14 @@ import uuid
 from datetime import datetime
 
 from flask_security import RoleMixin, SQLAlchemyUserDatastore, UserMixin
+from sqlalchemy import event, func
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import validates
 
+from src.config import Settings
+from src.db.partitions import create_monthly_partitions
 from src.db.postgres import db
+from src.utils.permissions import permission_registry
 
 from .mixins import AuditMixin
 
@@ -19,24 +24,32 @@ roles_users = db.Table(
         default=datetime.now,
         onupdate=datetime.now,
     ),
+    db.UniqueConstraint("user_id", "role_id", name="uq_roles_users_user_id_role_id"),
 )
 
 
 class Permission:
-    VIEW = 4
-    CREATE = 8
-    UPDATE = 16
-    DELETE = 32
+    """Masks of permissions registered by name in `permission_registry`."""
+
+    VIEW = permission_registry.register("view", 2)
+    CREATE = permission_registry.register("create", 3)
+    UPDATE = permission_registry.register("update", 4)
+    DELETE = permission_registry.register("delete", 5)
+    # Every bit of the first byte, as granted to admins before the registry.
     ADMIN = 255
 
 
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
 class User(db.Model, AuditMixin, UserMixin):
     """Model to represent User data."""
 
     __tablename__ = "users"
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    email = db.Column(db.String(255), unique=True, nullable=False)
+    email = db.Column(db.String(255), nullable=False)
     password = db.Column(db.String(255), nullable=False)
     active = db.Column(db.Boolean())
     roles = db.relationship(
@@ -46,25 +59,52 @@ class User(db.Model, AuditMixin, UserMixin):
     )
     auth_logs = db.relationship("AuthorizationUserLog", backref="user", lazy=True)
 
+    @validates("email")
+    def validate_email(self, key: str, email: str) -> str:
+        return normalize_email(email)
+
     def __repr__(self):
         return f"<User {self.email}>"
 
 
+def _own_permissions(context) -> int:
+    return context.get_current_parameters().get("permissions") or 0
+
+
 class Role(db.Model, AuditMixin, RoleMixin):
     """Model to represent Role data related with users."""
 
     __tablename__ = "roles"
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    name = db.Column(db.String(80), unique=True, nullable=False)
-    permissions = db.Column(db.Integer)
+    name = db.Column(db.String(80), nullable=False)
+    permissions = db.Column(db.BigInteger)
     description = db.Column(db.String(255), nullable=True)
+    parent_id = db.Column(
+        UUID(as_uuid=True), db.ForeignKey("roles.id", ondelete="SET NULL")
+    )
+    # Permissions of the role and all its ancestors, flattened on write.
+    effective_permissions = db.Column(
+        db.BigInteger, nullable=False, default=_own_permissions
+    )
+
+    @validates("name")
+    def validate_name(self, key: str, name: str) -> str:
+        return name.strip()
 
 
 class AuthorizationUserLog(db.Model, AuditMixin):
-    """Model to represent log about successful user authorization."""
+    """Model to represent log about successful user authorization.
+
+    The table is partitioned by month of creation,
+    partition key has to be a part of the primary key.
+    """
 
     __tablename__ = "auth_user_logs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    created_at = db.Column(
+        db.DateTime(timezone=True), primary_key=True, default=datetime.now
+    )
     user_id = db.Column(
         UUID(as_uuid=True),
         db.ForeignKey("users.id"),
@@ -73,4 +113,25 @@ class AuthorizationUserLog(db.Model, AuditMixin):
     device = db.Column(db.String(255), nullable=True)
 
 
+# Emails and role names are unique regardless of case,
+# lookups compare lower() values to use these indexes.
+db.Index("uq_users_email_lower", func.lower(User.email), unique=True)
+db.Index("uq_roles_name_lower", func.lower(Role.name), unique=True)
+
+# Serves user login history keyset pagination.
+db.Index(
+    "ix_auth_user_logs_user_id_created_at_id",
+    AuthorizationUserLog.user_id,
+    AuthorizationUserLog.created_at.desc(),
+    AuthorizationUserLog.id.desc(),
+)
+
+
+@event.listens_for(AuthorizationUserLog.__table__, "after_create")
+def create_auth_user_logs_partitions(target, connection, **kwargs):
+    create_monthly_partitions(
+        connection, target.name, months_ahead=Settings.AUTH_LOG_PARTITIONS_AHEAD
+    )
+
+
 USER_DATASTORE = SQLAlchemyUserDatastore(db, User, Role)
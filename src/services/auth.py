@@ -1,16 +1,100 @@
+import base64
+import binascii
+import hashlib
+import json
 import time
-from typing import Optional
+import uuid
+from datetime import datetime
+from typing import Iterator, Optional
 
+from flask import current_app
 from flask_jwt_extended import (create_access_token, create_refresh_token,
                                 decode_token)
-from flask_security.utils import hash_password, verify_password
+from flask_security.signals import user_registered
 from loguru import logger
 from marshmallow import Schema, fields
+from sqlalchemy import func, tuple_
 
 from src.constants import CredentialType
 from src.db.postgres import db
-from src.db.redis import redis_db
-from src.models.user import USER_DATASTORE, AuthorizationUserLog, User
+from src.db.redis import pipeline, redis_db
+from src.models.user import (USER_DATASTORE, AuthorizationUserLog, User,
+                             normalize_email)
+from src.services.auth_log import auth_log_writer
+from src.services.email_filter import email_filter
+from src.services.password import password_hasher
+from src.services.permission import permission_service
+from src.utils.metrics import TOKENS_ISSUED
+from src.utils.permissions import encode_permissions
+from src.utils.utils import is_valid_uuid
+
+SESSIONS_KEY_PREFIX = "sessions"
+SESSION_KEY_PREFIX = "session"
+SESSION_FIELDS = ("device", "ip", "created_at", "refreshed_at")
+DEVICE_MAX_LENGTH = 255
+
+# Delete all sessions listed in the user sessions index
+# and the index itself in one round trip.
+# ARGV[1] is the prefix of the user session keys.
+DELETE_SESSIONS_SCRIPT = """
+local ids = redis.call('ZRANGE', KEYS[1], 0, -1)
+local keys = {}
+for i, id in ipairs(ids) do
+    keys[#keys + 1] = ARGV[1] .. id
+    if #keys == 1000 or i == #ids then
+        redis.call('DEL', unpack(keys))
+        keys = {}
+    end
+end
+redis.call('DEL', KEYS[1])
+return #ids
+"""
+
+# Rotate refresh token: replace the old token with the new one if the old one
+# is the current token of the session. If another token is presented
+# for the session, the old one was replayed, so the whole session is revoked.
+# ARGV are old and new tokens, ttl, expiration time, now, IP and session id.
+# Return 1 on success, 0 for unknown session and -1 for token reuse.
+ROTATE_REFRESH_TOKEN_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'token')
+if not current then
+    return 0
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('ZREM', KEYS[2], ARGV[7])
+    return -1
+end
+redis.call('HSET', KEYS[1], 'token', ARGV[2], 'refreshed_at', ARGV[5], 'ip', ARGV[6])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[7])
+redis.call('EXPIREAT', KEYS[2], ARGV[4])
+return 1
+"""
+
+# Drop expired sessions from the index and return id, expiration time
+# and metadata fields of every active session.
+# ARGV are now and the prefix of the user session keys.
+LIST_SESSIONS_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local sessions = redis.call('ZRANGE', KEYS[1], 0, -1, 'WITHSCORES')
+local result = {}
+for i = 1, #sessions, 2 do
+    result[#result + 1] = {
+        sessions[i],
+        sessions[i + 1],
+        redis.call(
+            'HMGET', ARGV[2] .. sessions[i], 'device', 'ip',
+            'created_at', 'refreshed_at'
+        )
+    }
+end
+return result
+"""
+
+delete_sessions_script = redis_db.register_script(DELETE_SESSIONS_SCRIPT)
+rotate_refresh_token_script = redis_db.register_script(ROTATE_REFRESH_TOKEN_SCRIPT)
+list_sessions_script = redis_db.register_script(LIST_SESSIONS_SCRIPT)
 
 
 class AuthUserLogSchema(Schema):
@@ -29,83 +113,296 @@ class AuthService:
 
         If credentials is correct return user object.
         """
-        user = USER_DATASTORE.get_user(identifier=email)
+        user = self.get_user_by_email(email)
         if not user:
+            password_hasher.verify_dummy(password)
             return None
-        password_is_correct = verify_password(password, user.password)
+        password_is_correct = password_hasher.verify_and_update(user, password)
         if not password_is_correct:
             return None
         return user
 
-    def redis_key(self, user_id: str, user_agent: str) -> str:
-        """Key template for redis db."""
-        return f"{user_id}:{user_agent}"
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        """Find user by email with one lower(email) index lookup.
+
+        Emails which are definitely not registered are not looked up.
+        """
+        if not email_filter.might_exist(email):
+            return None
+        return User.query.filter(
+            func.lower(User.email) == normalize_email(email)
+        ).first()
+
+    def register_user(self, email: str, password: str) -> User:
+        """Create a new user hashing password in the hashing pool."""
+        user = USER_DATASTORE.create_user(
+            email=email, password=password_hasher.hash(password)
+        )
+        db.session.commit()
+        email_filter.add(email)
+        user_registered.send(
+            current_app._get_current_object(), user=user, confirm_token=None
+        )
+        return user
+
+    def session_id(self, user_agent: Optional[str]) -> str:
+        """Fixed-length id of the user device session."""
+        return hashlib.sha256((user_agent or "").encode()).hexdigest()[:32]
+
+    def session_keys_prefix(self, user_id: str) -> str:
+        return f"{SESSION_KEY_PREFIX}:{user_id}:"
+
+    def session_key(self, user_id: str, session_id: str) -> str:
+        """Key of the session hash with refresh token and device metadata."""
+        return f"{self.session_keys_prefix(user_id)}{session_id}"
+
+    def sessions_key(self, user_id: str) -> str:
+        """Key of the sorted set indexing user sessions.
+
+        Members are session ids, scores are refresh token expiration timestamps.
+        """
+        return f"{SESSIONS_KEY_PREFIX}:{user_id}"
+
+    def session_record(
+        self, token: str, user_agent: Optional[str], ip: Optional[str]
+    ) -> dict:
+        """Fields of a new session hash."""
+        now = int(time.time())
+        return {
+            "token": token,
+            "device": (user_agent or "")[:DEVICE_MAX_LENGTH],
+            "ip": ip or "",
+            "created_at": now,
+            "refreshed_at": now,
+        }
 
-    def save_refresh_token_in_redis(self, token: str, user_agent: str):
-        """Save refresh token in Redis db."""
+    def save_refresh_token_in_redis(
+        self, token: str, user_agent: Optional[str], ip: Optional[str] = None
+    ):
+        """Save device session with refresh token and index it."""
         token_payload = decode_token(token)
         user_id = token_payload.get("sub")
         expired = token_payload.get("exp")
-        expired_seconds_time = int(expired - time.time())
-        redis_key: str = self.redis_key(user_id=user_id, user_agent=user_agent)
-        redis_db.setex(name=redis_key, time=expired_seconds_time, value=token)
+        session_id = self.session_id(user_agent)
+        session_key = self.session_key(user_id=user_id, session_id=session_id)
+        sessions_key: str = self.sessions_key(user_id=user_id)
+
+        with pipeline(transaction=True) as pipe:
+            pipe.delete(session_key)
+            pipe.hset(session_key, mapping=self.session_record(token, user_agent, ip))
+            pipe.expireat(session_key, expired)
+            pipe.zadd(sessions_key, {session_id: expired})
+            pipe.zremrangebyscore(sessions_key, "-inf", time.time())
+            # All refresh tokens share the same lifetime,
+            # so the newest one always expires last.
+            pipe.expireat(sessions_key, expired)
 
     def delete_all_refresh_tokens(self, user_id: str):
-        """Delete all refresh user tokens from redis db."""
-        keys = redis_db.keys(f"*{user_id}*")
-        if keys:
-            redis_db.delete(*keys)
+        """Delete all user sessions from redis db."""
+        delete_sessions_script(
+            keys=[self.sessions_key(user_id=user_id)],
+            args=[self.session_keys_prefix(user_id)],
+        )
+
+    def delete_user_refresh_token(self, user_id: str, user_agent: Optional[str]):
+        """Delete session of the user device from Redis db."""
+        self.delete_user_session(user_id, self.session_id(user_agent))
 
-    def delete_user_refresh_token(self, user_id: str, user_agent: str):
-        """Delete user refresh token from Redis db."""
-        redis_key: str = self.redis_key(user_id=user_id, user_agent=user_agent)
-        redis_db.delete(redis_key)
+    def delete_user_session(self, user_id: str, session_id: str) -> bool:
+        """Delete user session by id, return False if there is no such session."""
+        with pipeline(transaction=True) as pipe:
+            pipe.delete(self.session_key(user_id=user_id, session_id=session_id))
+            pipe.zrem(self.sessions_key(user_id=user_id), session_id)
+        deleted, _ = pipe.results
+        return bool(deleted)
 
-    def get_jwt_tokens(self, user: User) -> dict:
+    def get_user_sessions(self, user_id: str) -> list:
+        """Get active user sessions with device metadata in one round trip."""
+        sessions = list_sessions_script(
+            keys=[self.sessions_key(user_id=user_id)],
+            args=[time.time(), self.session_keys_prefix(user_id)],
+        )
+        return [
+            {
+                "id": session_id.decode(),
+                "expired_at": int(expired),
+                **{
+                    field: value.decode() if value is not None else None
+                    for field, value in zip(SESSION_FIELDS, values)
+                },
+            }
+            for session_id, expired, values in sessions
+        ]
+
+    def count_user_sessions(self, user_id: str) -> int:
+        """Get number of active user sessions."""
+        return redis_db.zcount(self.sessions_key(user_id=user_id), time.time(), "+inf")
+
+    def migrate_legacy_refresh_tokens(self) -> int:
+        """Move refresh tokens saved as `{user_id}:{user_agent}` strings
+        to session hashes and index them.
+
+        Uses incremental SCAN, so Redis is not blocked while migrating,
+        tokens of every SCAN page are read and moved in two round trips.
+        Return number of users whose sessions were migrated.
+        """
+        expirations = {}
+        pipe = redis_db.pipeline(transaction=False)
+        cursor = None
+        while cursor != 0:
+            cursor, keys = redis_db.scan(cursor or 0, match="*:*", count=1000)
+            legacy_keys = [
+                key for key in keys if is_valid_uuid(key.decode().split(":", 1)[0])
+            ]
+            if not legacy_keys:
+                continue
+            with pipeline() as read_pipe:
+                for legacy_key in legacy_keys:
+                    read_pipe.ttl(legacy_key)
+                    read_pipe.get(legacy_key)
+            values = read_pipe.results
+            for legacy_key, ttl, token in zip(
+                legacy_keys, values[::2], values[1::2]
+            ):
+                if ttl <= 0 or token is None:
+                    continue
+                user_id, user_agent = legacy_key.decode().split(":", 1)
+                expired = int(time.time()) + ttl
+                session_id = self.session_id(user_agent)
+                session_key = self.session_key(user_id=user_id, session_id=session_id)
+                record = self.session_record(token.decode(), user_agent, ip=None)
+                pipe.hset(session_key, mapping=record)
+                pipe.expireat(session_key, expired)
+                pipe.zadd(self.sessions_key(user_id=user_id), {session_id: expired})
+                pipe.delete(legacy_key)
+                expirations[user_id] = max(expired, expirations.get(user_id, 0))
+            pipe.execute()
+
+        for user_id, expired in expirations.items():
+            pipe.expireat(self.sessions_key(user_id=user_id), expired)
+        pipe.execute()
+        return len(expirations)
+
+    def get_jwt_tokens(self, user_id: str) -> dict:
         """Get access and refresh tokens for authenticate user."""
-        permissions = 0
-        for role in user.roles:
-            permissions |= role.permissions
-        permissions = {"perms": permissions}
+        permissions = {
+            "perms": encode_permissions(permission_service.get_permissions(user_id))
+        }
 
         access_token = create_access_token(
-            identity=user.id, additional_claims=permissions
+            identity=user_id, additional_claims=permissions
         )
-        refresh_token = create_refresh_token(identity=user.id)
+        refresh_token = create_refresh_token(identity=user_id)
+        TOKENS_ISSUED.labels("access").inc()
+        TOKENS_ISSUED.labels("refresh").inc()
         return {
             "access": access_token,
             "refresh": refresh_token,
         }
 
     def create_user_auth_log(self, user_id: str, device: str):
-        """Create AuthorizationUserLog record after successful user auth."""
+        """Create AuthorizationUserLog record after successful user auth.
+
+        The record is saved in background by the batched log writer.
+        """
+        auth_log_writer.write(user_id=user_id, device=device)
+
+    def encode_logs_cursor(self, logged_at: datetime, log_id: uuid.UUID) -> str:
+        """Encode position of login history record to opaque cursor."""
+        position = f"{logged_at.isoformat()}|{log_id}"
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_logs_cursor(self, cursor: str) -> tuple:
+        """Decode login history cursor, raise ValueError if it is invalid."""
         try:
-            auth_log = AuthorizationUserLog(user_id=user_id, device=device)
-            db.session.add(auth_log)
-            db.session.commit()
-        except Exception as error:
-            logger.error(
-                f"When saving the user authorization log,"
-                f" the following error occurred - {error}"
+            logged_at, log_id = (
+                base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            )
+            return datetime.fromisoformat(logged_at), uuid.UUID(log_id)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValueError("Invalid cursor.")
+
+    def get_auth_user_logs(
+        self, user_id: str, size: int, cursor: Optional[str] = None
+    ) -> Iterator[str]:
+        """Get page of user login history newest first as JSON chunks.
+
+        Records after the cursor are fetched with keyset pagination
+        on (user_id, created_at, id) index, the cursor of the next page
+        is written after the records.
+        """
+        query = (
+            db.session.query(
+                AuthorizationUserLog.id,
+                AuthorizationUserLog.device,
+                AuthorizationUserLog.created_at,
             )
+            .filter(AuthorizationUserLog.user_id == user_id)
+            .order_by(
+                AuthorizationUserLog.created_at.desc(), AuthorizationUserLog.id.desc()
+            )
+        )
+        if cursor:
+            query = query.filter(
+                tuple_(AuthorizationUserLog.created_at, AuthorizationUserLog.id)
+                < tuple_(*self.decode_logs_cursor(cursor))
+            )
+        auth_user_log_schema = AuthUserLogSchema(only=("device", "logged_at"))
+
+        def generate():
+            next_cursor = None
+            yield '{"logs": ['
+            for number, auth_log in enumerate(query.limit(size + 1).yield_per(size)):
+                if number == size:
+                    next_cursor = self.encode_logs_cursor(
+                        last_log.created_at, last_log.id
+                    )
+                    break
+                if number:
+                    yield ","
+                yield json.dumps(auth_user_log_schema.dump(auth_log))
+                last_log = auth_log
+            yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+        return generate()
 
-    def get_auth_user_logs(self, user_id: str):
-        """Get user login history information."""
-        user_auth_logs = AuthorizationUserLog.query.filter_by(user_id=user_id)
-        auth_user_log_schema = AuthUserLogSchema(
-            many=True, only=("device", "logged_at")
+    def refresh_jwt_tokens(
+        self,
+        user_id: str,
+        user_agent: Optional[str],
+        refresh_token: str,
+        ip: Optional[str] = None,
+    ) -> Optional[dict]:
+        """Get new pair of JWT tokens rotating user refresh token in Redis db.
+
+        Return None if refresh token is not the current token of the session.
+        """
+        jwt_tokens: dict = self.get_jwt_tokens(user_id=user_id)
+
+        token_payload = decode_token(jwt_tokens["refresh"])
+        expired = token_payload.get("exp")
+        expired_seconds_time = int(expired - time.time())
+        session_id = self.session_id(user_agent)
+        session_key = self.session_key(user_id=user_id, session_id=session_id)
+        result = rotate_refresh_token_script(
+            keys=[session_key, self.sessions_key(user_id=user_id)],
+            args=[
+                refresh_token,
+                jwt_tokens["refresh"],
+                expired_seconds_time,
+                expired,
+                int(time.time()),
+                ip or "",
+                session_id,
+            ],
         )
-        return auth_user_log_schema.dump(user_auth_logs)
-
-    def refresh_jwt_tokens(self, user_id: str, user_agent: str) -> Optional[dict]:
-        """Get user refresh token from Redis db."""
-        redis_key: str = self.redis_key(user_id=user_id, user_agent=user_agent)
-        token_in_redis: Optional[bytes] = redis_db.get(redis_key)
-        if token_in_redis:
-            self.delete_user_refresh_token(user_id=user_id, user_agent=user_agent)
-            user = User.query.filter_by(id=user_id).first_or_404()
-            jwt_tokens: Optional[dict] = self.get_jwt_tokens(user=user)
-            return jwt_tokens
+        if result == -1:
+            logger.warning(
+                f"Refresh token reuse detected, session {session_key} was revoked"
+            )
+        if result != 1:
+            return None
+        return jwt_tokens
 
     def _change_password(
         self, user: User, old_password: str, new_password: str
@@ -115,13 +412,13 @@ class AuthService:
         If it was failed to change the password,
         return False and an error message.
         """
-        is_correct_password = verify_password(old_password, user.password)
+        is_correct_password = password_hasher.verify(old_password, user.password)
         if not is_correct_password:
             return False, "Incorrect user password."
         if len(new_password) < 8:
             return False, "Incorrect new password length. Must be more then 7."
 
-        user.password = hash_password(new_password)
+        user.password = password_hasher.hash(new_password)
         db.session.commit()
         return True, ""
 
@@ -131,11 +428,11 @@ class AuthService:
         If it was failed to change the email,
         return False and an error message.
         """
-        user_with_new_email = User.query.filter_by(email=new_email).first()
-        if user_with_new_email:
+        if self.get_user_by_email(new_email):
             return False, "User with new email already exists."
         user.email = new_email
         db.session.commit()
+        email_filter.add(new_email)
         return True, ""
 
     def change_user_credentials(
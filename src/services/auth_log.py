@@ -0,0 +1,141 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from flask import Flask
+from loguru import logger
+
+from src.config import Settings
+from src.db.postgres import db
+from src.models.user import AuthorizationUserLog
+from src.utils.metrics import AUTH_LOG_QUEUE_DEPTH, AUTH_LOG_RECORDS
+
+
+class AuthLogWriter:
+    """Background writer of AuthorizationUserLog records.
+
+    Records are put into a bounded in-memory queue and saved by a worker
+    thread (greenlet under gevent) with multi-row INSERT every `batch_size`
+    records or `flush_interval` seconds. If the queue is full, the record
+    is saved synchronously by the caller. A batch failed to be saved is
+    saved row by row, so only records failing on their own are dropped,
+    they are counted in metrics and logged.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, queue_size: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._app: Optional[Flask] = None
+        self._pid = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def init_app(self, app: Flask):
+        self._app = app
+        atexit.register(self.stop)
+
+    def write(self, user_id: str, device: str):
+        """Put log record into the queue."""
+        self._ensure_worker()
+        now = datetime.now()
+        record = {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "device": device,
+            "created_at": now,
+            "update_at": now,
+        }
+        try:
+            self.queue.put_nowait(record)
+            AUTH_LOG_RECORDS.labels("enqueued").inc()
+        except queue.Full:
+            AUTH_LOG_RECORDS.labels("overflowed").inc()
+            self._flush([record])
+        AUTH_LOG_QUEUE_DEPTH.set(self.queue.qsize())
+
+    def stop(self, timeout: float = 5):
+        """Stop the worker and save all queued records."""
+        self._stopping.set()
+        if self._thread and self._pid == os.getpid():
+            self._thread.join(timeout)
+        batch = self._drain()
+        if batch:
+            self._flush(batch)
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            AUTH_LOG_QUEUE_DEPTH.set(self.queue.qsize())
+            if batch:
+                self._flush(batch)
+
+    def _next_batch(self) -> list:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> list:
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _flush(self, batch: list):
+        try:
+            self._insert(batch)
+        except Exception as error:
+            if len(batch) == 1:
+                self._drop(batch, error)
+                return
+            logger.warning(
+                f"When saving {len(batch)} user authorization logs,"
+                f" the following error occurred - {error}, saving them one by one"
+            )
+            for record in batch:
+                try:
+                    self._insert([record])
+                except Exception as record_error:
+                    self._drop([record], record_error)
+
+    def _insert(self, batch: list):
+        with self._app.app_context(), db.engine.begin() as connection:
+            connection.execute(AuthorizationUserLog.__table__.insert().values(batch))
+        AUTH_LOG_RECORDS.labels("written").inc(len(batch))
+
+    def _drop(self, batch: list, error: Exception):
+        AUTH_LOG_RECORDS.labels("failed").inc(len(batch))
+        logger.error(
+            f"User authorization log of user {batch[0]['user_id']} is dropped,"
+            f" the following error occurred - {error}"
+        )
+
+
+auth_log_writer = AuthLogWriter(
+    batch_size=Settings.AUTH_LOG_BATCH_SIZE,
+    flush_interval=Settings.AUTH_LOG_FLUSH_INTERVAL_MS / 1000,
+    queue_size=Settings.AUTH_LOG_QUEUE_SIZE,
+)
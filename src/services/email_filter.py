@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+from flask import Flask, current_app
+from loguru import logger
+from redis.exceptions import RedisError
+
+from src.config import Settings
+from src.db.postgres import db
+from src.db.redis import pipeline, redis_db
+from src.models.user import User, normalize_email
+from src.utils.bloom import BloomFilter
+
+REGISTERED_EMAILS_KEY_PREFIX = "registered_emails"
+REBUILD_LOCK_TIMEOUT = 600
+
+
+class EmailFilter:
+    """Existence filter of registered emails.
+
+    Bloom filter bits are kept in a Redis bitmap and mirrored in every
+    worker. Emails missing in the worker copy are checked in the bitmap,
+    so an email missing in both is definitely not registered and the
+    database is not queried. The bitmap is rebuilt from the database
+    in background when it is missing or older than the rebuild interval,
+    until then every email may be registered. Redis errors make the filter
+    answer that every email may be registered too.
+
+    Users inserted bypassing `add`, e.g. with SQL, are not in the filter
+    until it is rebuilt with `flask emails reindex`.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        refresh_interval: int,
+        rebuild_interval: int,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        # Empty filter of the same geometry to get bit positions of emails.
+        self._geometry = BloomFilter(capacity, error_rate)
+        # Geometry is a part of the key, so resizing starts a new bitmap.
+        size, hash_count = self._geometry.size, self._geometry.hash_count
+        self.key = f"{REGISTERED_EMAILS_KEY_PREFIX}:{size}:{hash_count}"
+        self._filter: Optional[BloomFilter] = None
+        self._checked_at = 0.0
+
+    def might_exist(self, email: str) -> bool:
+        """Check email, False means it is definitely not registered."""
+        email = normalize_email(email)
+        try:
+            bloom_filter = self._get_filter()
+            if bloom_filter is None or email in bloom_filter:
+                return True
+
+            bitfield = redis_db.bitfield(self.key)
+            for position in bloom_filter.positions(email):
+                bitfield.get("u1", position)
+            found = all(bitfield.execute())
+        except RedisError as error:
+            logger.warning(f"Emails filter is not available - {error}")
+            return True
+        if found:
+            bloom_filter.add(email)
+        return found
+
+    def add(self, email: str):
+        """Add registered or changed email.
+
+        If the bitmap can not be updated, it is marked as not ready,
+        so the filter is bypassed until it is rebuilt.
+        """
+        email = normalize_email(email)
+        try:
+            with pipeline() as pipe:
+                for position in self._geometry.positions(email):
+                    pipe.setbit(self.key, position, 1)
+        except RedisError as error:
+            logger.error(f"Failed to add email to emails filter - {error}")
+            self._filter = None
+            self._checked_at = 0.0
+            try:
+                redis_db.delete(f"{self.key}:ready")
+            except RedisError:
+                logger.exception("Failed to reset emails filter")
+            return
+        if self._filter is not None:
+            self._filter.add(email)
+
+    def rebuild(self) -> int:
+        """Add emails of all users to the bitmap, return users count.
+
+        Bits are merged with BITOP OR, so emails added during the rebuild
+        are kept.
+        """
+        bloom_filter = BloomFilter(self.capacity, self.error_rate)
+        users_count = 0
+        for (email,) in db.session.query(User.email).yield_per(10000):
+            bloom_filter.add(normalize_email(email))
+            users_count += 1
+
+        temporary_key = f"{self.key}:{uuid.uuid4().hex}"
+        with pipeline(transaction=True) as pipe:
+            pipe.set(temporary_key, bytes(bloom_filter.bits))
+            pipe.bitop("OR", self.key, self.key, temporary_key)
+            pipe.delete(temporary_key)
+            pipe.set(f"{self.key}:ready", 1, ex=self.rebuild_interval)
+        self._filter = None
+        self._checked_at = 0.0
+        return users_count
+
+    def _get_filter(self) -> Optional[BloomFilter]:
+        if time.monotonic() - self._checked_at > self.refresh_interval:
+            self._checked_at = time.monotonic()
+            if not redis_db.exists(f"{self.key}:ready"):
+                self._filter = None
+                self._schedule_rebuild()
+            else:
+                bits = redis_db.get(self.key)
+                self._filter = (
+                    BloomFilter(self.capacity, self.error_rate, bits=bits)
+                    if bits
+                    else None
+                )
+        return self._filter
+
+    def _schedule_rebuild(self):
+        lock_key = f"{self.key}:rebuilding"
+        if not redis_db.set(lock_key, os.getpid(), nx=True, ex=REBUILD_LOCK_TIMEOUT):
+            return
+        threading.Thread(
+            target=self._rebuild_in_background,
+            args=(current_app._get_current_object(), lock_key),
+            daemon=True,
+        ).start()
+
+    def _rebuild_in_background(self, app: Flask, lock_key: str):
+        with app.app_context():
+            try:
+                users_count = self.rebuild()
+                logger.info(f"Emails filter is built for {users_count} users")
+            except Exception:
+                logger.exception("Failed to build emails filter")
+            finally:
+                db.session.remove()
+                redis_db.delete(lock_key)
+
+
+email_filter = EmailFilter(
+    capacity=Settings.EMAIL_FILTER_CAPACITY,
+    error_rate=Settings.EMAIL_FILTER_ERROR_RATE,
+    refresh_interval=Settings.EMAIL_FILTER_REFRESH_INTERVAL,
+    rebuild_interval=Settings.EMAIL_FILTER_REBUILD_INTERVAL,
+)
@@ -0,0 +1,199 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set
+
+from flask.ctx import AppContext
+from flask_security.utils import hash_password
+
+from src.db.postgres import db
+from src.models.user import normalize_email
+
+_worker_app_context: Optional[AppContext] = None
+
+
+def _init_hash_worker(rounds: Optional[int]):
+    """Push app context in the worker process to hash like Flask-Security."""
+    global _worker_app_context
+    from src import create_app
+
+    app = create_app()
+    if rounds:
+        app.extensions["security"].pwd_context.update(
+            bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds
+        )
+    _worker_app_context = app.app_context()
+    _worker_app_context.push()
+
+
+def _hash_password(password: str) -> str:
+    return hash_password(password)
+
+
+def read_records(path: str, file_format: Optional[str] = None) -> Iterator[dict]:
+    """Stream records of CSV file with header or JSON lines file."""
+    file_format = file_format or Path(path).suffix.lstrip(".").lower()
+    with open(path, newline="") as file:
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+        elif file_format in ("jsonl", "ndjson"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported file format {file_format}")
+
+
+def batches(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(records)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _parse_roles(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [role.strip() for role in value.split(";") if role.strip()]
+    return list(value)
+
+
+class Importer:
+    """Bulk import of users, roles and user role memberships.
+
+    Every batch is loaded with COPY into a temporary table and moved into
+    the target table with one INSERT ... SELECT ... ON CONFLICT DO NOTHING,
+    so existing rows are skipped and import can be safely restarted.
+    Ids of users with new memberships are collected in `changed_user_ids`
+    to invalidate their cached roles.
+    """
+
+    def __init__(self, batch_size: int = 10000, workers: Optional[int] = None):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.changed_user_ids: Set[str] = set()
+
+    def import_roles(self, records: Iterable[dict]) -> int:
+        rows = (
+            (
+                record["name"].strip(),
+                int(record.get("permissions") or 0),
+                record.get("description"),
+            )
+            for record in records
+        )
+        return self._copy_and_insert(
+            rows,
+            "import_roles (name text, permissions integer, description text)",
+            "INSERT INTO roles (id, name, permissions, effective_permissions, "
+            "description, created_at, update_at) "
+            "SELECT gen_random_uuid(), name, permissions, permissions, description, "
+            "now(), now() FROM import_roles ON CONFLICT DO NOTHING",
+        )
+
+    def import_memberships(self, records: Iterable[dict]) -> int:
+        rows = (
+            (normalize_email(record["email"]), role.strip())
+            for record in records
+            for role in _parse_roles(record.get("role") or record.get("roles"))
+        )
+        return self._copy_and_insert(
+            rows,
+            "import_memberships (email text, role text)",
+            "INSERT INTO roles_users (user_id, role_id, created_at, update_at) "
+            "SELECT users.id, roles.id, now(), now() FROM import_memberships "
+            "JOIN users ON lower(users.email) = import_memberships.email "
+            "JOIN roles ON lower(roles.name) = lower(import_memberships.role) "
+            "ON CONFLICT DO NOTHING RETURNING user_id",
+            returned=self.changed_user_ids,
+        )
+
+    def import_users(
+        self, records: Iterable[dict], rounds: Optional[int] = None
+    ) -> tuple:
+        """Import users with their roles hashing passwords in process pool.
+
+        Records have `email`, `password` or already hashed `password_hash`,
+        optional `active` and `roles` (list or ';' separated names) fields.
+        Return numbers of created users and memberships.
+        """
+        users_count = memberships_count = 0
+        workers = self.workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_hash_worker,
+            initargs=(rounds,),
+        ) as pool:
+            for batch in batches(records, self.batch_size):
+                passwords = [
+                    record["password"]
+                    for record in batch
+                    if not record.get("password_hash")
+                ]
+                hashes = iter(
+                    pool.map(
+                        _hash_password,
+                        passwords,
+                        chunksize=max(1, len(passwords) // (workers * 4)),
+                    )
+                )
+                rows = [
+                    (
+                        normalize_email(record["email"]),
+                        record.get("password_hash") or next(hashes),
+                        str(record.get("active", True)).lower() not in ("0", "false"),
+                    )
+                    for record in batch
+                ]
+                users_count += self._copy_and_insert(
+                    rows,
+                    "import_users (email text, password text, active boolean)",
+                    "INSERT INTO users "
+                    "(id, email, password, active, created_at, update_at) "
+                    "SELECT gen_random_uuid(), email, password, active, now(), now() "
+                    "FROM import_users ON CONFLICT DO NOTHING",
+                )
+                memberships_count += self.import_memberships(batch)
+        return users_count, memberships_count
+
+    def _copy_and_insert(
+        self,
+        rows: Iterable[tuple],
+        temp_table: str,
+        insert_statement: str,
+        returned: Optional[Set[str]] = None,
+    ) -> int:
+        """Load rows with COPY batch by batch and insert them.
+
+        Values returned by the statement are added to `returned`.
+        Return number of inserted rows.
+        """
+        inserted = 0
+        table_name = temp_table.split(" ", 1)[0]
+        connection = db.engine.raw_connection()
+        try:
+            iterator = iter(rows)
+            while batch := list(islice(iterator, self.batch_size)):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP")
+                    cursor.copy_expert(
+                        f"COPY {table_name} FROM STDIN WITH (FORMAT csv)", buffer
+                    )
+                    cursor.execute(insert_statement)
+                    inserted += cursor.rowcount
+                    if returned is not None:
+                        returned.update(str(value) for (value,) in cursor.fetchall())
+                connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+        return inserted
@@ -0,0 +1,131 @@
+import base64
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from flask import Flask
+from flask_jwt_extended import JWTManager
+
+PRIVATE_KEY_SUFFIX = ".pem"
+PUBLIC_KEY_SUFFIX = ".pub.pem"
+
+
+def _b64url(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).rstrip(b"=").decode()
+
+
+def _int_to_b64url(value: int) -> str:
+    return _b64url(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+class KeyRing:
+    """Asymmetric JWT signing keys identified by key id (kid).
+
+    Keys are read from JWT_KEYS_DIR: `<kid>.pem` files are private keys
+    which can sign tokens, `<kid>.pub.pem` files are public keys of retired
+    keys kept to verify tokens issued before rotation. Tokens are signed with
+    JWT_SIGNING_KEY_ID key or the last private key by kid order.
+    """
+
+    def __init__(self):
+        self.algorithm: Optional[str] = None
+        self.signing_kid: Optional[str] = None
+        self.private_keys = {}
+        self.public_keys = {}
+        self._jwks: dict = {"keys": []}
+        self.jwks_etag = ""
+
+    @property
+    def is_enabled(self) -> bool:
+        return self.signing_kid is not None
+
+    def init_app(self, app: Flask, jwt_manager: JWTManager):
+        self.algorithm = app.config["JWT_ALGORITHM"]
+        if self.algorithm.startswith("HS"):
+            return
+        self.load(app.config["JWT_KEYS_DIR"], app.config.get("JWT_SIGNING_KEY_ID"))
+
+        jwt_manager.encode_key_loader(self._encode_key)
+        jwt_manager.decode_key_loader(self._decode_key)
+        jwt_manager.additional_headers_loader(self._headers)
+
+    def load(self, keys_dir: str, signing_kid: Optional[str] = None):
+        for path in sorted(Path(keys_dir).glob(f"*{PRIVATE_KEY_SUFFIX}")):
+            if path.name.endswith(PUBLIC_KEY_SUFFIX):
+                kid = path.name[: -len(PUBLIC_KEY_SUFFIX)]
+                self.public_keys[kid] = serialization.load_pem_public_key(
+                    path.read_bytes()
+                )
+                continue
+            kid = path.name[: -len(PRIVATE_KEY_SUFFIX)]
+            private_key = serialization.load_pem_private_key(
+                path.read_bytes(), password=None
+            )
+            self.private_keys[kid] = private_key
+            self.public_keys[kid] = private_key.public_key()
+
+        if not self.private_keys:
+            raise RuntimeError(f"No JWT private keys found in {keys_dir}")
+        self.signing_kid = signing_kid or max(self.private_keys)
+        if self.signing_kid not in self.private_keys:
+            raise RuntimeError(f"JWT signing key {self.signing_kid} not found")
+
+        self._jwks = {
+            "keys": [self._jwk(kid, key) for kid, key in self.public_keys.items()]
+        }
+        self.jwks_etag = hashlib.sha256(
+            json.dumps(self._jwks, sort_keys=True).encode()
+        ).hexdigest()
+
+    def jwks(self) -> dict:
+        """Get public keys in JSON Web Key Set format."""
+        return self._jwks
+
+    def _jwk(self, kid: str, public_key) -> dict:
+        jwk = {"kid": kid, "use": "sig", "alg": self.algorithm}
+        if isinstance(public_key, rsa.RSAPublicKey):
+            numbers = public_key.public_numbers()
+            jwk.update(
+                kty="RSA", n=_int_to_b64url(numbers.n), e=_int_to_b64url(numbers.e)
+            )
+        elif isinstance(public_key, ed25519.Ed25519PublicKey):
+            raw = public_key.public_bytes(
+                serialization.Encoding.Raw, serialization.PublicFormat.Raw
+            )
+            jwk.update(kty="OKP", crv="Ed25519", x=_b64url(raw))
+        else:
+            raise RuntimeError(f"Unsupported JWT key type of key {kid}")
+        return jwk
+
+    def _encode_key(self, identity):
+        return self.private_keys[self.signing_kid]
+
+    def _decode_key(self, jwt_header: dict, jwt_data: dict):
+        # Unknown kid falls back to the signing key and fails verification.
+        return self.public_keys.get(
+            jwt_header.get("kid"), self.public_keys[self.signing_kid]
+        )
+
+    def _headers(self, identity) -> dict:
+        return {"kid": self.signing_kid}
+
+
+def generate_private_key(algorithm: str) -> bytes:
+    """Generate PEM encoded private key for JWT signing algorithm."""
+    if algorithm.startswith(("RS", "PS")):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Unsupported JWT algorithm {algorithm}")
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+key_ring = KeyRing()
@@ -0,0 +1,125 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import bcrypt
+from flask import Flask
+from flask_security.utils import hash_password, verify_password
+from gevent import monkey
+from gevent.threadpool import ThreadPool
+from loguru import logger
+
+from src.config import Settings
+from src.db.postgres import db
+from src.models.user import User
+from src.utils.metrics import PASSWORD_HASH_DURATION
+
+
+class PasswordHasher:
+    """Password hashing in a bounded pool of OS threads.
+
+    bcrypt releases GIL, so hashing in OS threads does not block the worker.
+    Under gevent a dedicated gevent thread pool is used, so only the waiting
+    greenlet is suspended and the event loop keeps serving other requests,
+    while the hub thread pool stays available to other blocking calls.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.rounds: Optional[int] = None
+        self._app: Optional[Flask] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._threadpool: Optional[ThreadPool] = None
+        self._pid = None
+        self._dummy_hash: Optional[str] = None
+
+    def init_app(self, app: Flask, security):
+        """Configure bcrypt cost of Flask-Security password context.
+
+        Cost is taken from PASSWORD_HASH_ROUNDS or calibrated so that one hash
+        fits PASSWORD_HASH_BUDGET_MS. Hashes with a deprecated scheme or a cost
+        lower than PASSWORD_HASH_ROUNDS are rehashed on successful login.
+        Calibrated cost is only used for new hashes: it differs between
+        hosts, so hashes below it are rehashed only under
+        PASSWORD_HASH_MIN_ROUNDS.
+        """
+        self._app = app
+        if security.password_hash != "bcrypt":
+            return
+        self.rounds = Settings.PASSWORD_HASH_ROUNDS or self.calibrate(
+            budget=Settings.PASSWORD_HASH_BUDGET_MS / 1000,
+            min_rounds=Settings.PASSWORD_HASH_MIN_ROUNDS,
+        )
+        security.pwd_context.update(
+            bcrypt__default_rounds=self.rounds,
+            bcrypt__min_rounds=Settings.PASSWORD_HASH_ROUNDS
+            or Settings.PASSWORD_HASH_MIN_ROUNDS,
+        )
+        logger.info(f"Password hash cost is set to {self.rounds} bcrypt rounds")
+
+    def calibrate(self, budget: float, min_rounds: int) -> int:
+        """Get maximal bcrypt cost hashing one password within time budget."""
+        rounds = min_rounds
+        salt = bcrypt.gensalt(rounds)
+        started_at = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        duration = time.perf_counter() - started_at
+        # Each additional round doubles hashing time.
+        while duration * 2 <= budget and rounds < 31:
+            rounds += 1
+            duration *= 2
+        return rounds
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        with PASSWORD_HASH_DURATION.labels("verify").time():
+            return self._run(verify_password, password, password_hash)
+
+    def hash(self, password: str) -> str:
+        with PASSWORD_HASH_DURATION.labels("hash").time():
+            return self._run(hash_password, password)
+
+    def verify_dummy(self, password: str):
+        """Verify password against a random hash.
+
+        It takes as long as verification of an existing user password,
+        so unknown emails are not revealed by response time.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash(os.urandom(16).hex())
+        self.verify(password, self._dummy_hash)
+
+    def verify_and_update(self, user: User, password: str) -> bool:
+        """Verify user password and rehash it if hash is out of date."""
+        if not self.verify(password, user.password):
+            return False
+        pwd_context = self._app.extensions["security"].pwd_context
+        if pwd_context.needs_update(user.password):
+            user.password = self.hash(password)
+            db.session.commit()
+        return True
+
+    def _run(self, func: Callable, *args):
+        if monkey.is_module_patched("threading"):
+            threadpool = self._get_threadpool()
+            return threadpool.apply(self._in_app_context, (func, *args))
+        return self._get_executor().submit(self._in_app_context, func, *args).result()
+
+    def _get_threadpool(self) -> ThreadPool:
+        if self._threadpool is None or self._pid != os.getpid():
+            self._threadpool = ThreadPool(self.workers)
+            self._pid = os.getpid()
+        return self._threadpool
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            self._pid = os.getpid()
+        return self._executor
+
+    def _in_app_context(self, func: Callable, *args):
+        with self._app.app_context():
+            return func(*args)
+
+
+password_hasher = PasswordHasher(workers=Settings.PASSWORD_HASH_WORKERS)
@@ -0,0 +1,95 @@
+import time
+from typing import Iterable, Optional
+
+from src.config import Settings
+from src.db.postgres import db
+from src.models.user import Role, roles_users
+from src.utils.cache import LRUCache
+from src.utils.pubsub import event_bus
+
+USER_ROLES_CHANGED_EVENT = "user_roles_changed"
+ROLES_CHANGED_EVENT = "roles_changed"
+# Invalidation of more users drops cached roles of all users
+# instead of publishing a huge list of ids.
+INVALIDATE_USERS_LIMIT = 1000
+ALL_USERS = "*"
+
+
+class PermissionService:
+    """Effective user permissions with in-process cache.
+
+    Keeps user id -> role ids LRU cache and role id -> permissions map,
+    so user permissions are calculated without database queries
+    when both are cached. Invalidation is broadcast to all workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.ttl = ttl
+        self.user_roles = LRUCache(maxsize=maxsize, ttl=ttl, name="user_roles")
+        self._role_permissions: Optional[dict] = None
+        self._role_permissions_loaded_at = 0.0
+        event_bus.subscribe(USER_ROLES_CHANGED_EVENT, self._on_user_roles_changed)
+        event_bus.subscribe(ROLES_CHANGED_EVENT, self._on_roles_changed)
+
+    def get_permissions(self, user_id: str) -> int:
+        """Get bitmask of effective permissions of all user roles."""
+        event_bus.ensure_listener()
+        user_id = str(user_id)
+        role_ids = self.user_roles.get(user_id)
+        if role_ids is None:
+            role_ids = tuple(
+                str(role_id)
+                for (role_id,) in db.session.query(roles_users.c.role_id).filter(
+                    roles_users.c.user_id == user_id
+                )
+            )
+            self.user_roles.set(user_id, role_ids)
+
+        role_permissions = self._get_role_permissions()
+        permissions = 0
+        for role_id in role_ids:
+            permissions |= role_permissions.get(role_id) or 0
+        return permissions
+
+    def invalidate_users(self, user_ids: Iterable[str]):
+        """Drop cached roles of users in all workers."""
+        user_ids = [str(user_id) for user_id in user_ids]
+        if not user_ids:
+            return
+        payload = ",".join(user_ids)
+        if len(user_ids) > INVALIDATE_USERS_LIMIT:
+            payload = ALL_USERS
+        event_bus.publish(USER_ROLES_CHANGED_EVENT, payload)
+
+    def invalidate_roles(self):
+        """Drop cached role permissions in all workers."""
+        event_bus.publish(ROLES_CHANGED_EVENT)
+
+    def _get_role_permissions(self) -> dict:
+        if (
+            self._role_permissions is None
+            or time.monotonic() - self._role_permissions_loaded_at > self.ttl
+        ):
+            self._role_permissions = {
+                str(role_id): permissions
+                for role_id, permissions in db.session.query(
+                    Role.id, Role.effective_permissions
+                )
+            }
+            self._role_permissions_loaded_at = time.monotonic()
+        return self._role_permissions
+
+    def _on_user_roles_changed(self, payload: str):
+        if payload == ALL_USERS:
+            self.user_roles.clear()
+            return
+        for user_id in filter(None, payload.split(",")):
+            self.user_roles.delete(user_id)
+
+    def _on_roles_changed(self, payload: str):
+        self._role_permissions = None
+
+
+permission_service = PermissionService(
+    maxsize=Settings.PERMISSIONS_CACHE_SIZE, ttl=Settings.PERMISSIONS_CACHE_TTL
+)
@@ -0,0 +1,189 @@
+import hashlib
+import time
+import uuid
+from functools import wraps
+from http import HTTPStatus
+from typing import Callable, NamedTuple, Optional
+
+from flask import abort, request
+from loguru import logger
+
+from src.config import Settings
+from src.db.redis import redis_db
+from src.models.user import normalize_email
+from src.utils.metrics import RATE_LIMIT_CHECKS
+
+RATE_LIMIT_KEY_PREFIX = "ratelimit"
+
+# Sliding window log of attempts for every rule with progressive lockout.
+# KEYS are window, lock and strikes keys of every rule, ARGV are now (ms),
+# attempt id, then window (ms), limit, lockout (ms) and max lockout (ms)
+# of every rule. Locked or exceeded rules reject the attempt without
+# recording it, lockout doubles with every strike.
+# Return milliseconds to wait, 0 when the attempt is allowed.
+HIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local retry_after = 0
+for i = 1, #KEYS, 3 do
+    local ttl = redis.call('PTTL', KEYS[i + 1])
+    if ttl > retry_after then
+        retry_after = ttl
+    end
+end
+if retry_after > 0 then
+    return retry_after
+end
+
+for i = 1, #KEYS, 3 do
+    local rule = 3 + (i - 1) / 3 * 4
+    local window = tonumber(ARGV[rule])
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+    if redis.call('ZCARD', KEYS[i]) >= tonumber(ARGV[rule + 1]) then
+        local max_lockout = tonumber(ARGV[rule + 3])
+        local strikes = redis.call('INCR', KEYS[i + 2])
+        redis.call('PEXPIRE', KEYS[i + 2], max_lockout * 2)
+        local lockout = math.min(
+            tonumber(ARGV[rule + 2]) * 2 ^ (strikes - 1), max_lockout
+        )
+        redis.call('SET', KEYS[i + 1], strikes, 'PX', lockout)
+        if lockout > retry_after then
+            retry_after = lockout
+        end
+    end
+end
+if retry_after > 0 then
+    return retry_after
+end
+
+for i = 1, #KEYS, 3 do
+    local rule = 3 + (i - 1) / 3 * 4
+    redis.call('ZADD', KEYS[i], now, ARGV[2])
+    redis.call('PEXPIRE', KEYS[i], ARGV[rule])
+end
+return 0
+"""
+
+hit_script = redis_db.register_script(HIT_SCRIPT)
+
+
+class RateLimitRule(NamedTuple):
+    """Limit of attempts per window for an identity of the request.
+
+    Requests without identity, e.g. login without email, are not limited
+    by the rule.
+    """
+
+    name: str
+    identity: Callable[[], Optional[str]]
+    limit: int
+    window: int = Settings.RATE_LIMIT_WINDOW
+    lockout: int = Settings.RATE_LIMIT_LOCKOUT
+    max_lockout: int = Settings.RATE_LIMIT_MAX_LOCKOUT
+
+
+class RateLimiter:
+    """Redis sliding window rate limiter with progressive lockout.
+
+    All rules of a request are checked and recorded in one script call.
+    Allowed and rejected attempts are counted per rule in metrics.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+
+    def redis_keys(self, rule: RateLimitRule, identity: str) -> list:
+        digest = hashlib.sha1(identity.encode()).hexdigest()
+        key = f"{RATE_LIMIT_KEY_PREFIX}:{rule.name}:{digest}"
+        return [key, f"{key}:lock", f"{key}:strikes"]
+
+    def hit(self, *rules: RateLimitRule) -> float:
+        """Record attempt, return seconds to wait if it is rejected."""
+        if not self.enabled:
+            return 0
+        keys, args = [], [int(time.time() * 1000), uuid.uuid4().hex]
+        names = []
+        for rule in rules:
+            identity = rule.identity()
+            if not identity:
+                continue
+            names.append(rule.name)
+            keys.extend(self.redis_keys(rule, identity))
+            args.extend(
+                [
+                    rule.window * 1000,
+                    rule.limit,
+                    rule.lockout * 1000,
+                    rule.max_lockout * 1000,
+                ]
+            )
+        if not keys:
+            return 0
+
+        retry_after = hit_script(keys=keys, args=args) / 1000
+        result = "limited" if retry_after else "allowed"
+        for name in names:
+            RATE_LIMIT_CHECKS.labels(name, result).inc()
+        if retry_after:
+            logger.warning(
+                "Rate limit exceeded on {}: {}", request.endpoint, ", ".join(names)
+            )
+        return retry_after
+
+    def reset(self, rule: RateLimitRule):
+        """Forget attempts and strikes of the request identity after success."""
+        identity = rule.identity()
+        if self.enabled and identity:
+            redis_db.delete(*self.redis_keys(rule, identity))
+
+    def limit(self, *rules: RateLimitRule):
+        """Reject requests over any of rules with 429 and Retry-After."""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapped(*args, **kwargs):
+                retry_after = self.hit(*rules)
+                if retry_after:
+                    return abort(
+                        HTTPStatus.TOO_MANY_REQUESTS,
+                        "Too many attempts, try again later",
+                        retry_after=max(int(retry_after + 0.999), 1),
+                    )
+                return func(*args, **kwargs)
+
+            return wrapped
+
+        return decorator
+
+
+def request_email() -> Optional[str]:
+    email = request.values.get("email")
+    if email is None and request.is_json:
+        email = (request.get_json(silent=True) or {}).get("email")
+    return normalize_email(email) if isinstance(email, str) else None
+
+
+def request_ip() -> Optional[str]:
+    return request.remote_addr
+
+
+def request_client() -> Optional[str]:
+    return f"{request.remote_addr}|{request.user_agent.string}"
+
+
+LOGIN_EMAIL_RULE = RateLimitRule(
+    "login:email", request_email, limit=Settings.LOGIN_EMAIL_RATE_LIMIT
+)
+LOGIN_IP_RULE = RateLimitRule(
+    "login:ip", request_ip, limit=Settings.LOGIN_IP_RATE_LIMIT
+)
+LOGIN_CLIENT_RULE = RateLimitRule(
+    "login:client", request_client, limit=Settings.LOGIN_CLIENT_RATE_LIMIT
+)
+REGISTER_IP_RULE = RateLimitRule(
+    "register:ip", request_ip, limit=Settings.REGISTER_IP_RATE_LIMIT
+)
+REFRESH_CLIENT_RULE = RateLimitRule(
+    "refresh:client", request_client, limit=Settings.REFRESH_CLIENT_RATE_LIMIT
+)
+
+rate_limiter = RateLimiter(enabled=Settings.RATE_LIMIT_ENABLED)
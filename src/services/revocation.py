@@ -0,0 +1,80 @@
+import time
+from typing import Optional
+
+from flask_jwt_extended import JWTManager
+
+from src.config import Settings
+from src.db.redis import pipeline, redis_db
+from src.utils.bloom import BloomFilter
+from src.utils.pubsub import event_bus
+
+REVOKED_TOKEN_KEY_PREFIX = "revoked"
+REVOKED_TOKENS_KEY = "revoked_tokens"
+TOKEN_REVOKED_EVENT = "token_revoked"
+
+
+class TokenRevocationService:
+    """Denylist of revoked JWT tokens.
+
+    Revoked token ids are stored in Redis until token expiration. Every worker
+    keeps a Bloom filter of revoked ids rebuilt from Redis periodically
+    and updated via pub/sub, so only tokens matching the filter
+    are checked in Redis.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, refresh_interval: int):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self._filter: Optional[BloomFilter] = None
+        self._loaded_at = 0.0
+        event_bus.subscribe(TOKEN_REVOKED_EVENT, self._on_token_revoked)
+
+    def init_app(self, jwt_manager: JWTManager):
+        jwt_manager.token_in_blocklist_loader(self._check_token)
+
+    def redis_key(self, jti: str) -> str:
+        return f"{REVOKED_TOKEN_KEY_PREFIX}:{jti}"
+
+    def revoke(self, jti: str, expired: int):
+        """Revoke token until its expiration time."""
+        expired_seconds_time = int(expired - time.time())
+        if expired_seconds_time <= 0:
+            return
+        with pipeline() as pipe:
+            pipe.setex(name=self.redis_key(jti), time=expired_seconds_time, value=1)
+            pipe.zadd(REVOKED_TOKENS_KEY, {jti: expired})
+            pipe.zremrangebyscore(REVOKED_TOKENS_KEY, "-inf", time.time())
+        event_bus.publish(TOKEN_REVOKED_EVENT, jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        event_bus.ensure_listener()
+        if jti not in self._get_filter():
+            return False
+        return bool(redis_db.exists(self.redis_key(jti)))
+
+    def _check_token(self, jwt_header: dict, jwt_payload: dict) -> bool:
+        return self.is_revoked(jwt_payload["jti"])
+
+    def _get_filter(self) -> BloomFilter:
+        if (
+            self._filter is None
+            or time.monotonic() - self._loaded_at > self.refresh_interval
+        ):
+            bloom_filter = BloomFilter(self.capacity, self.error_rate)
+            for jti in redis_db.zrangebyscore(REVOKED_TOKENS_KEY, time.time(), "+inf"):
+                bloom_filter.add(jti.decode())
+            self._filter = bloom_filter
+            self._loaded_at = time.monotonic()
+        return self._filter
+
+    def _on_token_revoked(self, jti: str):
+        if self._filter is not None:
+            self._filter.add(jti)
+
+
+token_revocation_service = TokenRevocationService(
+    capacity=Settings.REVOKED_TOKENS_FILTER_CAPACITY,
+    error_rate=Settings.REVOKED_TOKENS_FILTER_ERROR_RATE,
+    refresh_interval=Settings.REVOKED_TOKENS_FILTER_REFRESH_INTERVAL,
+)
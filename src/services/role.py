@@ -1,39 +1,189 @@
-from typing import Optional
+import hashlib
+import json
+from bisect import bisect_right
+from typing import NamedTuple, Optional, Tuple
 
-from sqlalchemy import func
+from marshmallow import Schema, fields
+from sqlalchemy import func, text
 
+from src.config import Settings
 from src.db.postgres import db
+from src.db.redis import redis_db
 from src.models.user import Role
+from src.services.permission import ROLES_CHANGED_EVENT, permission_service
+from src.utils.cache import LRUCache
+from src.utils.pubsub import event_bus
+
+ROLES_GENERATION_KEY = "roles:generation"
+ROLES_CATALOGUE_KEY_PREFIX = "roles:catalogue"
+
+# Recompute effective permissions of all roles from their ancestors,
+# UNION stops the recursion on inheritance cycles.
+FLATTEN_PERMISSIONS_SQL = text(
+    "WITH RECURSIVE ancestors (id, ancestor_id) AS ("
+    "SELECT id, id FROM roles "
+    "UNION "
+    "SELECT ancestors.id, roles.parent_id FROM ancestors "
+    "JOIN roles ON roles.id = ancestors.ancestor_id "
+    "WHERE roles.parent_id IS NOT NULL), "
+    "effective AS ("
+    "SELECT ancestors.id, coalesce(bit_or(roles.permissions), 0) AS permissions "
+    "FROM ancestors JOIN roles ON roles.id = ancestors.ancestor_id "
+    "GROUP BY ancestors.id) "
+    "UPDATE roles SET effective_permissions = effective.permissions "
+    "FROM effective WHERE roles.id = effective.id "
+    "AND roles.effective_permissions <> effective.permissions"
+)
+
+ANCESTOR_IDS_SQL = text(
+    "WITH RECURSIVE ancestors (id) AS ("
+    "SELECT CAST(:role_id AS uuid) "
+    "UNION "
+    "SELECT roles.parent_id FROM ancestors "
+    "JOIN roles ON roles.id = ancestors.id "
+    "WHERE roles.parent_id IS NOT NULL) "
+    "SELECT id FROM ancestors"
+)
+
+
+class RoleSchema(Schema):
+    """Schema to represent Role model."""
+
+    id = fields.Str()
+    name = fields.Str()
+    permissions = fields.Int()
+    effective_permissions = fields.Int()
+    parent_id = fields.Str(allow_none=True)
+    description = fields.Str(allow_none=True)
+
+
+class RolesCatalogue(NamedTuple):
+    """All roles ordered by id, versioned by the roles generation."""
+
+    generation: int
+    etag: str
+    roles: list
+    ids: list
+
+    def page_etag(self, size: int, page: int, after: Optional[str]) -> str:
+        """ETag of a page, it changes with roles and with page parameters."""
+        page_key = f"{self.etag}:{size}:{page}:{after or ''}"
+        return hashlib.sha1(page_key.encode()).hexdigest()
 
 
 class RoleService:
+    """Roles management with cached catalogue of all roles.
+
+    The catalogue is cached in process and in Redis under the roles
+    generation, which is bumped on every role change. Workers drop
+    their copy on the roles changed event or when it expires.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.catalogue = LRUCache(maxsize=1, ttl=ttl, name="roles_catalogue")
+        event_bus.subscribe(ROLES_CHANGED_EVENT, self._on_roles_changed)
+
     def add_role(
-        self, role_name: str, permissions: int, description: Optional[str]
+        self,
+        role_name: str,
+        permissions: int,
+        description: Optional[str],
+        parent_id: Optional[str] = None,
     ) -> None:
-        role = Role(name=role_name, permissions=permissions, description=description)
+        role = Role(
+            name=role_name,
+            permissions=permissions,
+            description=description,
+            parent_id=parent_id,
+        )
         db.session.add(role)
+        db.session.flush()
+        if parent_id:
+            db.session.execute(FLATTEN_PERMISSIONS_SQL)
         db.session.commit()
+        self.bump_generation()
 
     def get_role_by_id(self, id: str):
         return Role.query.filter_by(id=id).first()
 
     def get_role_by_name(self, name: str):
-        return Role.query.filter(func.lower(Role.name) == func.lower(name)).first()
+        return Role.query.filter(
+            func.lower(Role.name) == name.strip().lower()
+        ).first()
+
+    def get_roles(
+        self, size: int, page: int = 1, after: Optional[str] = None
+    ) -> Tuple[RolesCatalogue, list]:
+        """Get catalogue and a page of roles ordered by id.
+
+        Roles after the given id are returned when `after` is set,
+        otherwise page is used.
+        """
+        catalogue = self.get_catalogue()
+        start = bisect_right(catalogue.ids, after) if after else (page - 1) * size
+        return catalogue, catalogue.roles[start : start + size]
 
-    def get_roles(self, page: int, size: int) -> list:
-        res = Role.query.paginate(page, size, False)
-        return res.items
+    def get_catalogue(self) -> RolesCatalogue:
+        event_bus.ensure_listener()
+        catalogue = self.catalogue.get("roles")
+        if catalogue is not None:
+            return catalogue
+
+        generation = int(redis_db.get(ROLES_GENERATION_KEY) or 0)
+        key = f"{ROLES_CATALOGUE_KEY_PREFIX}:{generation}"
+        data = redis_db.get(key)
+        if data is None:
+            roles = RoleSchema(many=True).dump(Role.query.order_by(Role.id))
+            data = json.dumps(roles).encode()
+            redis_db.set(key, data, ex=self.ttl)
+        else:
+            roles = json.loads(data)
+
+        catalogue = RolesCatalogue(
+            generation=generation,
+            etag=hashlib.sha1(data).hexdigest(),
+            roles=roles,
+            ids=[role["id"] for role in roles],
+        )
+        self.catalogue.set("roles", catalogue)
+        return catalogue
+
+    def can_inherit(self, role_id: str, parent_id: str) -> bool:
+        """Check that the parent is not the role itself or its descendant."""
+        ancestor_ids = {
+            str(ancestor_id)
+            for (ancestor_id,) in db.session.execute(
+                ANCESTOR_IDS_SQL, {"role_id": parent_id}
+            )
+        }
+        return str(role_id) not in ancestor_ids
 
     def update_role(self, role: Role, updated_fields: dict):
         for key, value in updated_fields.items():
             setattr(role, key, value)
 
         db.session.add(role)
+        db.session.flush()
+        if {"permissions", "parent_id"} & updated_fields.keys():
+            db.session.execute(FLATTEN_PERMISSIONS_SQL)
         db.session.commit()
+        self.bump_generation()
 
     def delete_role(self, id: str):
         Role.query.filter_by(id=id).delete()
+        db.session.execute(FLATTEN_PERMISSIONS_SQL)
         db.session.commit()
+        self.bump_generation()
+
+    def bump_generation(self):
+        """Invalidate roles catalogue and role permissions in all workers."""
+        redis_db.incr(ROLES_GENERATION_KEY)
+        self.catalogue.clear()
+        permission_service.invalidate_roles()
+
+    def _on_roles_changed(self, payload: str):
+        self.catalogue.clear()
 
 
-role_service = RoleService()
+role_service = RoleService(ttl=Settings.ROLES_CACHE_TTL)
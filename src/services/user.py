@@ -1,11 +1,30 @@
+from typing import List, Tuple
+
+from sqlalchemy import text
+
 from src.db.postgres import db
 from src.models.user import Role, User, roles_users
+from src.services.permission import permission_service
+
+# Input pairs of bulk role changes as a table of the statement.
+PAIRS_CTE = (
+    "pairs AS (SELECT * FROM unnest("
+    "CAST(:user_ids AS uuid[]), CAST(:role_ids AS uuid[])"
+    ") AS pairs (user_id, role_id))"
+)
+# Users matching email filter of bulk role changes, one more than limit
+# to tell that the filter matches too many users.
+MATCHED_USERS_CTE = (
+    "matched AS (SELECT id FROM users "
+    "WHERE lower(email) LIKE lower(:email_pattern) LIMIT :limit + 1)"
+)
 
 
 class UserService:
     def add_role(self, user: User, role: Role) -> None:
         user.roles.append(role)
         db.session.commit()
+        permission_service.invalidate_users([user.id])
 
     def has_role(self, user_id: str, role_id: str) -> bool:
         res = (
@@ -18,6 +37,140 @@ class UserService:
     def delete_role(self, user: User, role: Role) -> None:
         user.roles.remove(role)
         db.session.commit()
+        permission_service.invalidate_users([user.id])
+
+    def add_roles(self, pairs: List[Tuple[str, str]]) -> List[dict]:
+        """Add roles to users by (user_id, role_id) pairs in one statement.
+
+        Return status of every pair: added, exists or not_found.
+        """
+        rows = db.session.execute(
+            text(
+                f"WITH {PAIRS_CTE}, "
+                "valid AS ("
+                "SELECT DISTINCT pairs.user_id, pairs.role_id FROM pairs "
+                "JOIN users ON users.id = pairs.user_id "
+                "JOIN roles ON roles.id = pairs.role_id), "
+                "changed AS ("
+                "INSERT INTO roles_users (user_id, role_id, created_at, update_at) "
+                "SELECT user_id, role_id, now(), now() FROM valid "
+                "ON CONFLICT DO NOTHING RETURNING user_id, role_id) "
+                "SELECT pairs.user_id, pairs.role_id, "
+                "valid.user_id IS NOT NULL AS found, "
+                "changed.user_id IS NOT NULL AS changed "
+                "FROM pairs "
+                "LEFT JOIN valid USING (user_id, role_id) "
+                "LEFT JOIN changed USING (user_id, role_id)"
+            ),
+            self._pairs_params(pairs),
+        ).fetchall()
+        db.session.commit()
+        self._invalidate_changed(rows)
+        return [
+            {
+                "user_id": str(row.user_id),
+                "role_id": str(row.role_id),
+                "status": "added"
+                if row.changed
+                else ("exists" if row.found else "not_found"),
+            }
+            for row in rows
+        ]
+
+    def delete_roles(self, pairs: List[Tuple[str, str]]) -> List[dict]:
+        """Delete roles of users by (user_id, role_id) pairs in one statement.
+
+        Return status of every pair: deleted or not_found.
+        """
+        rows = db.session.execute(
+            text(
+                f"WITH {PAIRS_CTE}, "
+                "changed AS ("
+                "DELETE FROM roles_users USING pairs "
+                "WHERE roles_users.user_id = pairs.user_id "
+                "AND roles_users.role_id = pairs.role_id "
+                "RETURNING roles_users.user_id, roles_users.role_id) "
+                "SELECT pairs.user_id, pairs.role_id, "
+                "changed.user_id IS NOT NULL AS changed "
+                "FROM pairs "
+                "LEFT JOIN (SELECT DISTINCT user_id, role_id FROM changed) changed "
+                "USING (user_id, role_id)"
+            ),
+            self._pairs_params(pairs),
+        ).fetchall()
+        db.session.commit()
+        self._invalidate_changed(rows)
+        return [
+            {
+                "user_id": str(row.user_id),
+                "role_id": str(row.role_id),
+                "status": "deleted" if row.changed else "not_found",
+            }
+            for row in rows
+        ]
+
+    def add_role_by_email(self, role_id: str, email_pattern: str, limit: int) -> dict:
+        """Add role to users with email matching LIKE pattern.
+
+        Nothing is changed if more than `limit` users match.
+        Return numbers of matched users and added roles.
+        """
+        return self._change_role_by_email(
+            "INSERT INTO roles_users (user_id, role_id, created_at, update_at) "
+            "SELECT matched.id, roles.id, now(), now() FROM matched "
+            "JOIN roles ON roles.id = :role_id "
+            "WHERE (SELECT count(*) FROM matched) <= :limit "
+            "ON CONFLICT DO NOTHING RETURNING user_id",
+            role_id,
+            email_pattern,
+            limit,
+        )
+
+    def delete_role_by_email(
+        self, role_id: str, email_pattern: str, limit: int
+    ) -> dict:
+        """Delete role of users with email matching LIKE pattern.
+
+        Nothing is changed if more than `limit` users match.
+        Return numbers of matched users and deleted roles.
+        """
+        return self._change_role_by_email(
+            "DELETE FROM roles_users USING matched "
+            "WHERE roles_users.user_id = matched.id "
+            "AND roles_users.role_id = :role_id "
+            "AND (SELECT count(*) FROM matched) <= :limit "
+            "RETURNING roles_users.user_id",
+            role_id,
+            email_pattern,
+            limit,
+        )
+
+    def _change_role_by_email(
+        self, statement: str, role_id: str, email_pattern: str, limit: int
+    ) -> dict:
+        row = db.session.execute(
+            text(
+                f"WITH {MATCHED_USERS_CTE}, changed AS ({statement}) "
+                "SELECT (SELECT count(*) FROM matched) AS matched, "
+                "array(SELECT user_id FROM changed) AS user_ids"
+            ),
+            {"role_id": role_id, "email_pattern": email_pattern, "limit": limit},
+        ).one()
+        db.session.commit()
+        if row.user_ids:
+            permission_service.invalidate_users(row.user_ids)
+        return {"matched": row.matched, "changed": len(row.user_ids)}
+
+    def _pairs_params(self, pairs: List[Tuple[str, str]]) -> dict:
+        return {
+            "user_ids": [user_id for user_id, _ in pairs],
+            "role_ids": [role_id for _, role_id in pairs],
+        }
+
+    def _invalidate_changed(self, rows: list):
+        user_ids = {row.user_id for row in rows if row.changed}
+        if user_ids:
+            permission_service.invalidate_users(user_ids)
 
 
 user_service = UserService()
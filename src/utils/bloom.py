@@ -0,0 +1,37 @@
+import hashlib
+import math
+from typing import Iterator, Optional
+
+
+class BloomFilter:
+    """Bloom filter with double hashing of blake2b digest.
+
+    Bits are ordered as in Redis bitmaps (most significant bit first),
+    so the filter can be mirrored to Redis with SETBIT and loaded with GET.
+    """
+
+    def __init__(
+        self, capacity: int, error_rate: float, bits: Optional[bytes] = None
+    ):
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        if bits:
+            self.bits[: len(bits)] = bits[: len(self.bits)]
+
+    def positions(self, item: str) -> Iterator[int]:
+        """Get bit positions of the item."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 0x80 >> (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (0x80 >> (position & 7))
+            for position in self.positions(item)
+        )
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from src.utils.metrics import CACHE_REQUESTS
+
+
+class LRUCache:
+    """Thread-safe LRU cache with optional time to live of entries.
+
+    Hits and misses of named caches are exported to metrics.
+    """
+
+    def __init__(
+        self, maxsize: int, ttl: Optional[float] = None, name: Optional[str] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._hits_metric = name and CACHE_REQUESTS.labels(name, "hit")
+        self._misses_metric = name and CACHE_REQUESTS.labels(name, "miss")
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get cached value, expired entries are evicted on access."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] is not None and item[1] <= time.monotonic():
+                del self._data[key]
+                item = None
+            if item is not None:
+                self._data.move_to_end(key)
+        metric = self._misses_metric if item is None else self._hits_metric
+        if metric:
+            metric.inc()
+        return default if item is None else item[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Cache value, ttl overrides the default cache time to live."""
+        ttl = self.ttl if ttl is None else ttl
+        expired_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expired_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,36 @@
+import time
+
+from flask_jwt_extended import JWTManager
+
+from src.utils.cache import LRUCache
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager caching verified claims of recently decoded tokens.
+
+    Clients send the same access token until it expires, so claims are cached
+    by raw token string until token expiration and repeated requests skip
+    signature verification and JSON decoding.
+    """
+
+    def __init__(self, app=None, cache_size: int = 10000):
+        self.decoded_tokens = LRUCache(maxsize=cache_size, name="decoded_tokens")
+        super().__init__(app)
+
+    def _decode_jwt_from_config(
+        self, encoded_token, csrf_value=None, allow_expired=False
+    ) -> dict:
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(
+                encoded_token, csrf_value, allow_expired
+            )
+
+        claims = self.decoded_tokens.get(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token)
+            expired = claims.get("exp")
+            if expired and expired > time.time():
+                self.decoded_tokens.set(
+                    encoded_token, claims, ttl=expired - time.time()
+                )
+        return dict(claims)
@@ -0,0 +1,117 @@
+"""Prometheus metrics of the service.
+
+Under gunicorn metrics are written to PROMETHEUS_MULTIPROC_DIR by every
+worker and aggregated on scrape, so the directory has to be set before
+prometheus_client is imported. They are served by the master process
+on a separate port (see gunicorn.conf.py), /metrics route of the app
+is only added with METRICS_ROUTE_ENABLED for single process runs.
+"""
+import os
+import time
+
+from flask import Flask, Response, current_app, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+from src.config import Settings
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+PASSWORD_HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+REQUEST_DURATION = Histogram(
+    "auth_request_duration_seconds",
+    "Request processing time by resource.",
+    ["resource", "method"],
+)
+REQUESTS = Counter(
+    "auth_requests_total",
+    "Processed requests by resource and status code.",
+    ["resource", "method", "status"],
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "auth_password_hash_duration_seconds",
+    "Password hashing and verification time.",
+    ["operation"],
+    buckets=PASSWORD_HASH_BUCKETS,
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "auth_redis_command_duration_seconds",
+    "Redis command and pipeline round trip time.",
+    buckets=FAST_BUCKETS,
+)
+REDIS_POOL_WAIT_DURATION = Histogram(
+    "auth_redis_pool_wait_duration_seconds",
+    "Time spent waiting for a free Redis connection.",
+    buckets=FAST_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "auth_db_query_duration_seconds",
+    "SQL statement execution time.",
+    buckets=FAST_BUCKETS,
+)
+DB_SLOW_QUERIES = Counter(
+    "auth_db_slow_queries_total", "SQL statements slower than DB_SLOW_QUERY_MS."
+)
+TOKENS_ISSUED = Counter("auth_tokens_issued_total", "Issued JWT tokens.", ["type"])
+CACHE_REQUESTS = Counter(
+    "auth_cache_requests_total", "In-process cache lookups.", ["cache", "result"]
+)
+RATE_LIMIT_CHECKS = Counter(
+    "auth_rate_limit_checks_total", "Rate limit checks by rule.", ["rule", "result"]
+)
+AUTH_LOG_QUEUE_DEPTH = Gauge(
+    "auth_log_queue_depth",
+    "Authorization log records waiting to be saved.",
+    multiprocess_mode="livesum",
+)
+AUTH_LOG_RECORDS = Counter(
+    "auth_log_records_total",
+    "Authorization log records by outcome: enqueued, written, overflowed, failed.",
+    ["result"],
+)
+
+
+def _resource_name() -> str:
+    """Flask-RESTX resource class of the request, e.g. Login or RolesList."""
+    if request.endpoint is None:
+        return "unmatched"
+    view = current_app.view_functions.get(request.endpoint)
+    view_class = getattr(view, "view_class", None)
+    return view_class.__name__ if view_class else request.endpoint
+
+
+def _start_timer():
+    g.request_started_at = time.perf_counter()
+
+
+def _observe_request(response):
+    started_at = g.pop("request_started_at", None)
+    if started_at is not None and request.endpoint != "metrics":
+        resource = _resource_name()
+        REQUEST_DURATION.labels(resource, request.method).observe(
+            time.perf_counter() - started_at
+        )
+        REQUESTS.labels(resource, request.method, response.status_code).inc()
+    return response
+
+
+def metrics_view() -> Response:
+    """Expose metrics of all workers in Prometheus text format."""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app: Flask):
+    """Time every request, serve metrics on /metrics if it is enabled.
+
+    The route is not protected, so it must not be enabled on the listener
+    exposed to clients.
+    """
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    if Settings.METRICS_ROUTE_ENABLED:
+        app.add_url_rule("/metrics", "metrics", metrics_view)
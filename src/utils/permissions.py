@@ -0,0 +1,76 @@
+import base64
+from functools import lru_cache
+from typing import Dict, Iterable, List, Union
+
+# Bitmasks up to this value are put in tokens as is,
+# wider ones are encoded as base64url of little-endian bytes.
+CLAIM_INT_LIMIT = 2 ** 31
+# Role masks are stored as signed bigint and aggregated with bit_or,
+# so the sign bit 63 and above can not be used.
+MAX_PERMISSION_BIT = 62
+
+PermissionsClaim = Union[int, str]
+
+
+class PermissionRegistry:
+    """Named permissions mapped to bit positions of an integer bitset."""
+
+    def __init__(self):
+        self.bits: Dict[str, int] = {}
+
+    def register(self, name: str, bit: int) -> int:
+        """Register permission at the bit position, return its mask."""
+        if not 0 <= bit <= MAX_PERMISSION_BIT:
+            raise ValueError(
+                f"Permission {name} bit {bit} is out of 0..{MAX_PERMISSION_BIT}, "
+                "role permissions are stored as bigint"
+            )
+        if self.bits.get(name, bit) != bit:
+            raise ValueError(f"Permission {name} is registered at another bit")
+        if any(used == bit and other != name for other, used in self.bits.items()):
+            raise ValueError(f"Bit {bit} is already used")
+        self.bits[name] = bit
+        return 1 << bit
+
+    def mask(self, permissions: Union[int, str, Iterable[Union[int, str]]]) -> int:
+        """Build bitmask of permission masks and registered names."""
+        if isinstance(permissions, (int, str)):
+            permissions = [permissions]
+        mask = 0
+        for permission in permissions:
+            mask |= (
+                1 << self.bits[permission]
+                if isinstance(permission, str)
+                else permission
+            )
+        return mask
+
+    def names(self, mask: int) -> List[str]:
+        """Get names of registered permissions set in the bitmask."""
+        return [name for name, bit in self.bits.items() if mask >> bit & 1]
+
+
+def encode_permissions(mask: int) -> PermissionsClaim:
+    """Encode bitmask for the token claim."""
+    if mask < CLAIM_INT_LIMIT:
+        return mask
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+@lru_cache(maxsize=1024)
+def _decode_permissions(claim: str) -> int:
+    data = base64.urlsafe_b64decode(claim + "=" * (-len(claim) % 4))
+    return int.from_bytes(data, "little")
+
+
+def decode_permissions(claim: PermissionsClaim) -> int:
+    """Decode bitmask from the token claim, missing claim grants nothing."""
+    if not claim:
+        return 0
+    if isinstance(claim, int):
+        return claim
+    return _decode_permissions(claim)
+
+
+permission_registry = PermissionRegistry()
@@ -0,0 +1,60 @@
+import os
+from collections import defaultdict
+from typing import Callable
+
+from loguru import logger
+from redis import Redis
+
+from src.db.redis import redis_db
+
+EVENTS_CHANNEL = "auth:events"
+
+
+class EventBus:
+    """Broadcast events between application workers via Redis pub/sub.
+
+    Handlers are called in the publishing worker immediately and in other
+    workers when the message is received. The listener is started lazily
+    in every worker process, so it is never inherited through fork.
+    """
+
+    def __init__(self, redis_client: Redis, channel: str):
+        self.redis_client = redis_client
+        self.channel = channel
+        self._handlers = defaultdict(list)
+        self._pid = None
+        self._thread = None
+
+    def subscribe(self, event: str, handler: Callable[[str], None]):
+        """Register handler called with event payload."""
+        self._handlers[event].append(handler)
+
+    def publish(self, event: str, payload: str = ""):
+        self._dispatch(event, payload)
+        try:
+            self.redis_client.publish(self.channel, f"{event}:{payload}")
+        except Exception as error:
+            logger.error(f"Failed to publish event {event}: {error}")
+
+    def ensure_listener(self):
+        """Start listening to the channel in current process if not started."""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        try:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_message})
+            self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            self._pid = os.getpid()
+        except Exception as error:
+            logger.error(f"Failed to subscribe to {self.channel}: {error}")
+
+    def _on_message(self, message: dict):
+        event, _, payload = message["data"].decode().partition(":")
+        self._dispatch(event, payload)
+
+    def _dispatch(self, event: str, payload: str):
+        for handler in self._handlers[event]:
+            handler(payload)
+
+
+event_bus = EventBus(redis_db, EVENTS_CHANNEL)
@@ -6,6 +6,7 @@ from flask import abort
 from flask_jwt_extended import get_jwt
 
 from src.models.user import Permission
+from src.utils.permissions import decode_permissions, permission_registry
 
 
 def is_valid_uuid(uuid, version=4):
@@ -16,19 +17,33 @@ def is_valid_uuid(uuid, version=4):
     return True
 
 
-def check_permission(permission: Permission):
+def require_permissions(any_of=0, all_of=0):
     """
-    Check user permissions using jwt
+    Check user permissions using jwt.
+
+    Permissions are masks or registered names, they are compiled
+    to bitmasks once, so every check is a couple of bitwise operations.
     """
+    any_of_mask = permission_registry.mask(any_of)
+    all_of_mask = permission_registry.mask(all_of)
 
     def decorator(func):
         @wraps(func)
         def wrapped(*args, **kwargs):
-            jwt = get_jwt()
-            if jwt.get("perms") and (jwt["perms"] & permission):
+            perms = decode_permissions(get_jwt().get("perms"))
+            if (not any_of_mask or perms & any_of_mask) and (
+                perms & all_of_mask == all_of_mask
+            ):
                 return func(*args, **kwargs)
             return abort(HTTPStatus.FORBIDDEN, "Not enough rights")
 
         return wrapped
 
     return decorator
+
+
+def check_permission(permission: Permission):
+    """
+    Check user has any of permission bits using jwt
+    """
+    return require_permissions(any_of=permission)
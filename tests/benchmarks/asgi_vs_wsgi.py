@@ -0,0 +1,77 @@
+"""Compare /login and /refresh of the WSGI and the ASGI account API.
+
+Both servers have to use the same database and Redis with users seeded by
+`python -m tests.benchmarks.seed` and run with RATE_LIMIT_ENABLED=0, as in
+docker-compose.bench.yml: load comes from one address, so with rate limits
+the benchmark would measure 429 responses instead of authentication.
+Logins are spread across seeded users for the same reason.
+
+    python -m tests.benchmarks.asgi_vs_wsgi \
+        --wsgi-url http://localhost:5000 --asgi-url http://localhost:8000 \
+        --users 10000 --concurrency 1000 --duration 30
+"""
+import argparse
+import asyncio
+import random
+import sys
+
+import httpx
+
+from tests.benchmarks.auth_endpoints import login_virtual_users
+from tests.benchmarks.load import run_load
+from tests.benchmarks.seed import PASSWORD, user_email
+
+
+async def benchmark(name: str, base_url: str, args: argparse.Namespace):
+    async def login(client: httpx.AsyncClient, number: int) -> httpx.Response:
+        return await client.post(
+            "/login",
+            data={
+                "email": user_email(random.randrange(args.users)),
+                "password": PASSWORD,
+            },
+        )
+
+    result = await run_load(
+        f"{name} /login", base_url, login, args.concurrency, args.duration
+    )
+    print(result.report())
+
+    refresh_tokens = [
+        tokens["refresh"] for tokens in await login_virtual_users(base_url, args)
+    ]
+
+    async def refresh(client: httpx.AsyncClient, number: int) -> httpx.Response:
+        response = await client.post(
+            "/refresh",
+            headers={
+                "Authorization": f"Bearer {refresh_tokens[number]}",
+                "User-Agent": f"benchmark-{number}",
+            },
+        )
+        if response.status_code == 200:
+            refresh_tokens[number] = response.json()["refresh"]
+        return response
+
+    result = await run_load(
+        f"{name} /refresh", base_url, refresh, args.concurrency, args.duration
+    )
+    print(result.report())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wsgi-url", default="http://localhost:5000")
+    parser.add_argument("--asgi-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    asyncio.run(benchmark("WSGI", args.wsgi_url, args))
+    asyncio.run(benchmark("ASGI", args.asgi_url, args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
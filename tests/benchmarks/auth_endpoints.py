@@ -0,0 +1,125 @@
+"""Benchmark auth endpoints with seeded users.
+
+Seed users first with `python -m tests.benchmarks.seed`.
+
+    python -m tests.benchmarks.auth_endpoints --url http://localhost:5000 \
+        --users 10000 --concurrency 100 --duration 30
+"""
+import argparse
+import asyncio
+import random
+import sys
+
+import httpx
+
+from tests.benchmarks.load import run_load
+from tests.benchmarks.seed import ADMIN_EMAIL, PASSWORD, user_email
+
+SCENARIOS = ("login", "refresh", "login_history", "roles_list", "role_detail")
+LOGIN_CONCURRENCY = 50
+
+
+async def login(client: httpx.AsyncClient, email: str, device: str) -> dict:
+    response = await client.post(
+        "/login",
+        data={"email": email, "password": PASSWORD},
+        headers={"User-Agent": device},
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def login_virtual_users(base_url: str, args: argparse.Namespace) -> list:
+    """Get tokens of a distinct user and device for every virtual user."""
+    semaphore = asyncio.Semaphore(LOGIN_CONCURRENCY)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+
+        async def login_user(number: int) -> dict:
+            async with semaphore:
+                return await login(
+                    client, user_email(number % args.users), f"benchmark-{number}"
+                )
+
+        return await asyncio.gather(
+            *(login_user(number) for number in range(args.concurrency))
+        )
+
+
+async def benchmark(args: argparse.Namespace):
+    tokens = await login_virtual_users(args.url, args)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        admin_tokens = await login(client, ADMIN_EMAIL, "benchmark-admin")
+        admin_headers = {"Authorization": f"Bearer {admin_tokens['access']}"}
+        roles = await client.get(
+            "/roles", params={"page": 1, "size": 20}, headers=admin_headers
+        )
+        role_ids = [role["id"] for role in roles.json()]
+
+    async def login_scenario(client, number):
+        return await client.post(
+            "/login",
+            data={
+                "email": user_email(random.randrange(args.users)),
+                "password": PASSWORD,
+            },
+        )
+
+    async def refresh_scenario(client, number):
+        response = await client.post(
+            "/refresh",
+            headers={
+                "Authorization": f"Bearer {tokens[number]['refresh']}",
+                "User-Agent": f"benchmark-{number}",
+            },
+        )
+        if response.status_code == 200:
+            tokens[number] = response.json()
+        return response
+
+    async def login_history_scenario(client, number):
+        return await client.get(
+            "/login_history",
+            headers={"Authorization": f"Bearer {tokens[number]['access']}"},
+        )
+
+    async def roles_list_scenario(client, number):
+        return await client.get(
+            "/roles", params={"page": 1, "size": 20}, headers=admin_headers
+        )
+
+    async def role_detail_scenario(client, number):
+        return await client.get(
+            f"/role/{random.choice(role_ids)}", headers=admin_headers
+        )
+
+    scenarios = {
+        "login": login_scenario,
+        "refresh": refresh_scenario,
+        "login_history": login_history_scenario,
+        "roles_list": roles_list_scenario,
+        "role_detail": role_detail_scenario,
+    }
+    for name in args.scenarios:
+        result = await run_load(
+            name, args.url, scenarios[name], args.concurrency, args.duration
+        )
+        print(result.report())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    args = parser.parse_args()
+
+    asyncio.run(benchmark(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Closed-loop HTTP load generator.
+
+Every virtual user sends requests one after another until the deadline.
+"""
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List
+
+import httpx
+
+Scenario = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class LoadResult:
+    name: str
+    duration: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + self.errors
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    def percentile(self, percent: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100)[percent - 1]
+
+    def report(self) -> str:
+        return (
+            f"{self.name:>24}: {self.requests:>7} requests, {self.errors:>5} errors,"
+            f" {self.rps:>8.1f} rps, p50 {self.percentile(50) * 1000:7.1f} ms,"
+            f" p95 {self.percentile(95) * 1000:7.1f} ms,"
+            f" p99 {self.percentile(99) * 1000:7.1f} ms"
+        )
+
+
+async def run_load(
+    name: str,
+    base_url: str,
+    scenario: Scenario,
+    concurrency: int,
+    duration: float,
+    expected_status: int = 200,
+) -> LoadResult:
+    """Run scenario by `concurrency` virtual users for `duration` seconds."""
+    result = LoadResult(name=name)
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30
+    ) as client:
+        deadline = time.perf_counter() + duration
+
+        async def virtual_user(number: int):
+            while time.perf_counter() < deadline:
+                started_at = time.perf_counter()
+                try:
+                    response = await scenario(client, number)
+                except httpx.HTTPError:
+                    result.errors += 1
+                    continue
+                if response.status_code != expected_status:
+                    result.errors += 1
+                    continue
+                result.latencies.append(time.perf_counter() - started_at)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(virtual_user(number) for number in range(concurrency)))
+        result.duration = time.perf_counter() - started_at
+    return result
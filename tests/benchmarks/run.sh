@@ -0,0 +1,10 @@
+sh -c "python3 tests/functional/utils/ping.py"
+res=$?
+if [ $res -eq 0 ]
+then
+  python -m tests.benchmarks.seed --users "${BENCH_USERS:-10000}" \
+    && python -m tests.benchmarks.auth_endpoints --url "${API_URL}" \
+      --users "${BENCH_USERS:-10000}" \
+      --concurrency "${BENCH_CONCURRENCY:-100}" \
+      --duration "${BENCH_DURATION:-30}"
+fi
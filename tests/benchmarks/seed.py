@@ -0,0 +1,100 @@
+"""Seed benchmark users and roles with multi-row inserts.
+
+    python -m tests.benchmarks.seed --users 10000 --roles 10
+"""
+import argparse
+import sys
+import uuid
+
+from flask_security.utils import hash_password
+from sqlalchemy.dialects.postgresql import insert
+
+from src import create_app
+from src.db.postgres import db
+from src.models.user import Permission, Role, User, roles_users
+from src.services.email_filter import email_filter
+
+BATCH_SIZE = 1000
+PASSWORD = "benchmark"
+ADMIN_EMAIL = "bench-admin@example.com"
+
+
+def user_email(number: int) -> str:
+    return f"bench-{number}@example.com"
+
+
+def _id(name: str) -> uuid.UUID:
+    """Deterministic id, so seeding is idempotent."""
+    return uuid.uuid5(uuid.NAMESPACE_URL, f"auth-benchmark/{name}")
+
+
+def seed(users_count: int, roles_count: int, password: str = PASSWORD):
+    roles = [
+        {
+            "id": _id(f"role-{number}"),
+            "name": f"bench-role-{number}",
+            "permissions": Permission.VIEW,
+        }
+        for number in range(roles_count)
+    ]
+    roles.append(
+        {
+            "id": _id("role-admin"),
+            "name": "bench-admin",
+            "permissions": Permission.ADMIN,
+        }
+    )
+    db.session.execute(insert(Role.__table__).values(roles).on_conflict_do_nothing())
+
+    # Every user has the same password, so it is hashed once.
+    password_hash = hash_password(password)
+    emails = [user_email(number) for number in range(users_count)] + [ADMIN_EMAIL]
+    for start in range(0, len(emails), BATCH_SIZE):
+        batch = emails[start : start + BATCH_SIZE]
+        users = [
+            {
+                "id": _id(email),
+                "email": email,
+                "password": password_hash,
+                "active": True,
+            }
+            for email in batch
+        ]
+        memberships = [
+            {"user_id": _id(email), "role_id": _id(f"role-{number % roles_count}")}
+            for number, email in enumerate(batch, start=start)
+        ]
+        if batch[-1] == ADMIN_EMAIL:
+            memberships[-1]["role_id"] = _id("role-admin")
+        inserted_ids = {
+            user_id
+            for (user_id,) in db.session.execute(
+                insert(User.__table__)
+                .values(users)
+                .on_conflict_do_nothing()
+                .returning(User.__table__.c.id)
+            )
+        }
+        memberships = [row for row in memberships if row["user_id"] in inserted_ids]
+        if memberships:
+            db.session.execute(insert(roles_users).values(memberships))
+        db.session.commit()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--roles", type=int, default=10)
+    args = parser.parse_args()
+    if args.roles < 1:
+        parser.error("--roles must be at least 1")
+
+    with create_app().app_context():
+        seed(args.users, args.roles)
+        email_filter.rebuild()
+    print(f"Seeded {args.users} users and {args.roles} roles.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Measure worker cold start: import, app creation and first request latency.
+
+Every run is made in a fresh interpreter, so nothing is cached between runs.
+
+    python -m tests.benchmarks.startup --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+RUN_CODE = """
+import json
+import time
+
+started_at = time.perf_counter()
+import src
+imported_at = time.perf_counter()
+app = src.create_app()
+created_at = time.perf_counter()
+response = app.test_client().open({path!r}, method={method!r})
+responded_at = time.perf_counter()
+print(json.dumps({{
+    "import": imported_at - started_at,
+    "create_app": created_at - imported_at,
+    "first_request": responded_at - created_at,
+    "total": responded_at - started_at,
+}}))
+"""
+
+
+def run_once(path: str, method: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", RUN_CODE.format(path=path, method=method)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/login")
+    parser.add_argument("--method", default="POST")
+    args = parser.parse_args()
+
+    results = [run_once(args.path, args.method) for _ in range(args.runs)]
+    for stage in results[0]:
+        timings = [result[stage] * 1000 for result in results]
+        print(
+            f"{stage:>14}: median {statistics.median(timings):8.1f} ms,"
+            f" max {max(timings):8.1f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,12 @@
-from src import app, db
+from src import create_app, db
 from tests.functional.utils.add_test_data import add_test_data
 
 
 class BaseUnitTest:
     @classmethod
     def setUpClass(cls):
-        cls.app = app
-        cls.app_context = app.app_context()
+        cls.app = create_app()
+        cls.app_context = cls.app.app_context()
         cls.app_context.push()
         db.drop_all()
         db.create_all()
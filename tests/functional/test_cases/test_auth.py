@@ -5,6 +5,7 @@ import requests
 from flask_jwt_extended import create_access_token, create_refresh_token
 from flask_security.utils import verify_password
 
+from src.config import Settings
 from src.constants import CredentialType
 from src.models.user import User
 from tests.functional.test_cases.base import BaseUnitTest
@@ -40,6 +41,17 @@ class TestAuth(BaseUnitTest, unittest.TestCase):
         )
         self.assertTrue(HTTPStatus.FORBIDDEN == res.status_code)
 
+    def test_login_email_case_insensitive(self):
+        credentials = {**data.users[0], "email": data.users[0]["email"].upper()}
+        res = requests.post(url=_u("/login"), data=credentials)
+        self.assertTrue(HTTPStatus.OK == res.status_code)
+
+    def test_login_unknown_email(self):
+        res = requests.post(
+            url=_u("/login"), data={"email": "unknown@ya.ru", "password": "2"}
+        )
+        self.assertTrue(HTTPStatus.FORBIDDEN == res.status_code)
+
     def test_logout_success(self):
         access_token = create_access_token(identity=data.users[0]["id"])
         headers = {"Authorization": f"Bearer {access_token}"}
@@ -47,6 +59,14 @@ class TestAuth(BaseUnitTest, unittest.TestCase):
 
         self.assertTrue(HTTPStatus.OK == res.status_code)
 
+    def test_logout_revokes_access_token(self):
+        access_token = create_access_token(identity=data.users[0]["id"])
+        headers = {"Authorization": f"Bearer {access_token}"}
+        requests.post(url=_u("/logout"), headers=headers)
+        res = requests.get(url=_u("/login_history"), headers=headers)
+
+        self.assertTrue(HTTPStatus.UNAUTHORIZED == res.status_code)
+
     def test_logout_failed(self):
         res = requests.post(url=_u("/logout"))
         self.assertTrue(HTTPStatus.UNAUTHORIZED == res.status_code)
@@ -135,3 +155,64 @@ class TestAuth(BaseUnitTest, unittest.TestCase):
         res = requests.post(url=_u("/refresh"), headers=headers)
 
         self.assertTrue(HTTPStatus.UNAUTHORIZED == res.status_code)
+
+    def test_login_history_success(self):
+        access_token = create_access_token(identity=data.users[0]["id"])
+        headers = {"Authorization": f"Bearer {access_token}"}
+        res = requests.get(
+            url=_u("/login_history"), headers=headers, params={"size": 1}
+        )
+        resp_data = res.json()
+
+        self.assertIn("logs", resp_data)
+        self.assertIn("next_cursor", resp_data)
+        self.assertTrue(len(resp_data["logs"]) <= 1)
+        self.assertTrue(HTTPStatus.OK == res.status_code)
+
+    def test_login_history_failed(self):
+        access_token = create_access_token(identity=data.users[0]["id"])
+        headers = {"Authorization": f"Bearer {access_token}"}
+        res = requests.get(
+            url=_u("/login_history"), headers=headers, params={"cursor": "bad"}
+        )
+
+        self.assertTrue(HTTPStatus.BAD_REQUEST == res.status_code)
+
+    def test_login_rate_limited(self):
+        credentials = {"email": "stuffing@ya.ru", "password": "1"}
+        headers = {"User-Agent": "test_login_rate_limited"}
+        for _ in range(Settings.LOGIN_EMAIL_RATE_LIMIT):
+            res = requests.post(url=_u("/login"), data=credentials, headers=headers)
+            self.assertTrue(HTTPStatus.FORBIDDEN == res.status_code)
+
+        res = requests.post(url=_u("/login"), data=credentials, headers=headers)
+
+        self.assertTrue(HTTPStatus.TOO_MANY_REQUESTS == res.status_code)
+        self.assertIn("Retry-After", res.headers)
+
+    def test_sessions(self):
+        headers = {"User-Agent": "test_sessions"}
+        res = requests.post(url=_u("/login"), data=data.users[1], headers=headers)
+        headers["Authorization"] = f"Bearer {res.json()['access']}"
+
+        res = requests.get(url=_u("/sessions"), headers=headers)
+        [session] = [
+            session for session in res.json()["sessions"] if session["current"]
+        ]
+
+        self.assertTrue(HTTPStatus.OK == res.status_code)
+        self.assertEqual("test_sessions", session["device"])
+
+        res = requests.delete(url=_u(f"/sessions/{session['id']}"), headers=headers)
+        self.assertTrue(HTTPStatus.OK == res.status_code)
+
+        res = requests.delete(url=_u(f"/sessions/{session['id']}"), headers=headers)
+        self.assertTrue(HTTPStatus.NOT_FOUND == res.status_code)
+
+    def test_metrics(self):
+        requests.post(url=_u("/login"), data=data.users[0])
+        res = requests.get(url=_u("/metrics"))
+
+        self.assertTrue(HTTPStatus.OK == res.status_code)
+        self.assertIn('auth_request_duration_seconds_count{method="POST",', res.text)
+        self.assertIn('resource="Login"', res.text)
@@ -35,3 +35,101 @@ class TestPermissions(BaseUnitTest, unittest.TestCase):
         res = requests.post(url=_u("/roles"), headers=headers)
 
         self.assertTrue(HTTPStatus.FORBIDDEN == res.status_code)
+
+    def test_bulk_user_roles(self):
+        access_token = create_access_token(
+            identity=data.users[2]["id"],
+            additional_claims={"perms": Permission.ADMIN},
+        )
+        headers = {"Authorization": f"Bearer {access_token}"}
+        items = [
+            {"user_id": data.users[0]["id"], "role_id": data.roles[1]["id"]},
+            {"user_id": data.users[0]["id"], "role_id": "not-a-uuid"},
+        ]
+        res = requests.post(
+            url=_u("/users/roles"), headers=headers, json={"items": items}
+        )
+        statuses = [result["status"] for result in res.json()["results"]]
+
+        self.assertTrue(HTTPStatus.OK == res.status_code)
+        self.assertEqual(["added", "invalid"], statuses)
+
+        res = requests.delete(
+            url=_u("/users/roles"), headers=headers, json={"items": items[:1]}
+        )
+        statuses = [result["status"] for result in res.json()["results"]]
+
+        self.assertEqual(["deleted"], statuses)
+
+    def test_bulk_user_roles_by_email(self):
+        access_token = create_access_token(
+            identity=data.users[2]["id"],
+            additional_claims={"perms": Permission.ADMIN},
+        )
+        headers = {"Authorization": f"Bearer {access_token}"}
+        body = {
+            "role_id": data.roles[1]["id"],
+            "filter": {"email": data.users[0]["email"]},
+        }
+        res = requests.post(url=_u("/users/roles"), headers=headers, json=body)
+
+        self.assertTrue(HTTPStatus.OK == res.status_code)
+        self.assertEqual({"matched": 1, "changed": 1}, res.json())
+
+        res = requests.delete(url=_u("/users/roles"), headers=headers, json=body)
+
+        self.assertEqual({"matched": 1, "changed": 1}, res.json())
+
+    def test_role_inherits_parent_permissions(self):
+        access_token = create_access_token(
+            identity=data.users[2]["id"],
+            additional_claims={"perms": Permission.ADMIN},
+        )
+        headers = {"Authorization": f"Bearer {access_token}"}
+        res = requests.post(
+            url=_u("/roles"),
+            headers=headers,
+            data={
+                "name": "senior_moderator",
+                "permissions": Permission.DELETE,
+                "parent_id": data.roles[1]["id"],
+            },
+        )
+        self.assertTrue(HTTPStatus.OK == res.status_code)
+
+        res = requests.get(
+            url=_u("/roles"), headers=headers, params={"page": 1, "size": 10}
+        )
+        [role] = [role for role in res.json() if role["name"] == "senior_moderator"]
+
+        self.assertEqual(
+            data.roles[1]["permissions"] | Permission.DELETE,
+            role["effective_permissions"],
+        )
+
+    def test_roles_not_modified(self):
+        access_token = create_access_token(
+            identity=data.users[1]["id"], additional_claims={"perms": Permission.VIEW}
+        )
+        headers = {"Authorization": f"Bearer {access_token}"}
+        res = requests.get(url=_u("/roles"), headers=headers, params={"size": 1})
+
+        self.assertTrue(HTTPStatus.OK == res.status_code)
+        self.assertTrue(int(res.headers["X-Total-Count"]) >= len(data.roles))
+
+        etag = res.headers["ETag"]
+        res = requests.get(
+            url=_u("/roles"),
+            headers={**headers, "If-None-Match": etag},
+            params={"size": 1},
+        )
+
+        self.assertTrue(HTTPStatus.NOT_MODIFIED == res.status_code)
+
+        res = requests.get(
+            url=_u("/roles"),
+            headers={**headers, "If-None-Match": etag},
+            params={"size": 1, "page": 2},
+        )
+
+        self.assertTrue(HTTPStatus.OK == res.status_code)
@@ -2,6 +2,7 @@ from sqlalchemy.exc import IntegrityError
 
 from src.db.postgres import db
 from src.models.user import Role, User
+from src.services.email_filter import email_filter
 from tests.functional.test_data.data import roles, users
 
 
@@ -25,6 +26,7 @@ def add_test_data() -> None:
         role = roles_dict.get(u.email.split("@")[0])
         u.roles.append(role)
         _save_obj(u)
+    email_filter.rebuild()
 
 
 if __name__ == "__main__":
@@ -2,4 +2,11 @@ from gevent import monkey
 
 monkey.patch_all()
 
-from app import app
+from psycogreen.gevent import patch_psycopg
+
+# Make psycopg2 wait for the database cooperatively.
+patch_psycopg()
+
+from src import create_app
+
+app = create_app()